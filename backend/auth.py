@@ -1,6 +1,8 @@
-import os
+import time
+import secrets
+import logging
 from typing import Annotated
-from datetime import datetime, timedelta
+from datetime import timedelta
 # import uuid
 
 from fastapi import APIRouter, Response, Request, Depends, HTTPException, status
@@ -9,41 +11,35 @@ from backend.auth_cookie import OAuth2PasswordBearerWithCookie
 # from fastapi.security import OAuth2PasswordBearer
 
 from pydantic import BaseModel
-from jose import jwt, JWTError, ExpiredSignatureError
-from passlib.context import CryptContext
-from dotenv import load_dotenv
 
 from backend.models.user_model import User
-from backend.config.db import users_collection
+from backend.config.db import users_collection, get_email_collation
 from backend.config.constants import ERROR_CONNECTION_VALIDATION
+from backend.config.settings import get_settings
+from backend.hashing import bcrypt_context, hash_executor
+from backend.sessions import session_revocations
+from backend.token_cache import token_cache
+from backend.token_codec import ExpiredTokenError, InvalidTokenError, get_token_codec
+from backend.user_cache import user_cache
+from backend.metrics import JWT_VERIFY_TOTAL
 
 from backend.log import get_logger
 logger = get_logger(__name__)
 
-# Load environment variables from the .env file
-load_dotenv()
-
-# Access environment variables for Token Auth:
-SECRET_KEY = f"""{os.getenv("BACKEND_SECRET_KEY")}"""
-ALGORITHM = f"""{os.getenv("BACKEND_ALGORITHM")}"""
-ACCESS_TOKEN_EXPIRE_MINUTES = int(
-    os.getenv("BACKEND_ACCESS_TOKEN_EXPIRE_MINUTES"))
-REFRESH_TOKEN_EXPIRE_DAYS = int(
-    os.getenv("BACKEND_REFRESH_TOKEN_EXPIRE_DAYS"))
-
-# Access environment variables for Github OAuth:
-GITHUB_CLIENT_ID = f"""{os.getenv("GITHUB_CLIENT_ID")}"""
-GITHUB_SECRET_KEY = f"""{os.getenv("GITHUB_SECRET_KEY")}"""
-
-# Hashing context
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Use our special cookie-enabled OAuth2 bearers
 oauth_bearer = OAuth2PasswordBearerWithCookie(
     tokenUrl=f"user/login")
 github_oauth_bearer = OAuth2PasswordBearerWithCookie(
     tokenUrl=f"user/oauth/get-github-code")
 
+# Only fetch the fields needed to build a `User`: with the password hash to log in,
+# without it for token-authenticated requests (so hashes never sit in the user cache)
+USER_PROJECTION = {"email": 1, "password": 1, "admin": 1}
+AUTH_USER_PROJECTION = {"email": 1, "admin": 1}
+
+# `type` claim of refresh tokens (access tokens don't carry one)
+REFRESH_TOKEN_TYPE = "refresh"
+
 credential_exception = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
     detail=ERROR_CONNECTION_VALIDATION,
@@ -56,113 +52,157 @@ class Token(BaseModel):
     token_type: str
 
 
-def get_password_hash(password):
-    return bcrypt_context.hash(password)
+async def get_password_hash(password):
+    return await hash_executor.run(bcrypt_context.hash, password)
 
 
-def verify_password(plain_password, hashed_password):
-    return bcrypt_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    return await hash_executor.run(bcrypt_context.verify, plain_password, hashed_password)
 
 
 def verify_access_token(token: Annotated[str, Depends(oauth_bearer)] | Annotated[str, Depends(github_oauth_bearer)]) -> dict | None:
     """
     Verify the token is a good token and has not expired or gotten itself involved in
     anything nefarious by associating with data of ill repute.
+    Tokens we have already verified are answered from the `token_cache`, skipping the decode;
+    the rest are decoded by the configured `TOKEN_CODEC` (see `backend/token_codec.py`).
     """
+    token_data = token_cache.get(token)
+    if token_data is not None:
+        JWT_VERIFY_TOTAL.labels("ok").inc()
+        return token_data
     try:
-        payload = jwt.decode(
-            token=token,
-            key=SECRET_KEY,
-            algorithms=[ALGORITHM],
-        )
+        payload = get_token_codec().decode(token)
         email: str = payload.get("sub")
         user_id: str = payload.get("id")
-        exp: timedelta = payload.get("exp")
-        exp = datetime.utcfromtimestamp(exp)
-        check_date = exp - datetime.utcnow()
-
-        # print(
-        #     f"[yellow]\[{email}] Time till token expiration:[/yellow]", check_date)
+        exp: int = payload.get("exp")
 
-        logger.info(
-            f"[{email}] Time till token expiration: {check_date}")
+        if exp is not None and logger.isEnabledFor(logging.DEBUG):
+            check_date = timedelta(seconds=exp - time.time())
+            logger.debug(
+                f"[{email}] Time till token expiration: {check_date}")
 
         if email is None or user_id is None:
+            JWT_VERIFY_TOTAL.labels("invalid").inc()
             raise credential_exception
-        token_data = {"username": email, "id": user_id}
-    except ExpiredSignatureError:
+        token_data = {"username": email, "id": user_id, "exp": exp,
+                      "sid": payload.get("sid"), "type": payload.get("type")}
+    except ExpiredTokenError:
+        JWT_VERIFY_TOTAL.labels("expired").inc()
         print("[red]ExpiredSignatureERROR![/red]")
         logger.info("ExpiredSignature: Token has expired!")
         return None
-    except JWTError:
+    except InvalidTokenError:
+        JWT_VERIFY_TOTAL.labels("invalid").inc()
         print("[red]BRO ALERT: [i]Bad Token Detected & Rejected, bruh.[/i][/red]")
         logger.info("JWTError: Bad Token detected & rejected!")
         raise credential_exception
+    if exp is not None:
+        token_cache.put(token, token_data, exp=exp)
+    JWT_VERIFY_TOTAL.labels("ok").inc()
     return token_data
 
 
-def create_access_token(email: str, id: str, expires_delta: timedelta) -> str:
+def create_access_token(email: str, id: str, expires_delta: timedelta, session_id: str | None = None, token_type: str | None = None) -> str:
     """
-    Create a JWT token for access or refresh.
+    Create a JWT token for access or refresh (`token_type="refresh"`).
+    Every token gets its own `jti`; `sid` ties it to the login session that can revoke it.
     """
-    encode = {"sub": email, "id": id}
-    if expires_delta:
-        expires = datetime.utcnow() + expires_delta
-    else:
-        expires = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    encode.update({"exp": expires})
-    return jwt.encode(claims=encode, key=SECRET_KEY, algorithm=ALGORITHM)
-
-
-def get_user_from_db(email: str, **kwargs) -> User | None:
+    if not expires_delta:
+        expires_delta = timedelta(
+            minutes=get_settings().backend_access_token_expire_minutes)
+    encode = {"sub": email, "id": id, "jti": secrets.token_urlsafe(12),
+              "exp": int(time.time() + expires_delta.total_seconds())}
+    if session_id is not None:
+        encode["sid"] = session_id
+    if token_type is not None:
+        encode["type"] = token_type
+    return get_token_codec().encode(encode)
+
+
+async def get_user_from_db(email: str, projection: dict = USER_PROJECTION, **kwargs) -> User | None:
     """
     Uses the user's email address to find the account in the database and return a `User` object.
-    If there is an `id` in the kwargs, assign it to the returned user.
+    If there is an `id` in the kwargs, assign it to the returned user; otherwise use the document's `_id`.
+    (Validating is deliberate: for a model this small pydantic-core beats `model_construct()`,
+    see `bench/bench_list_endpoints.py`.)
     """
-    for user_data in users_collection.find():
-        if user_data["email"] == email:
-            # instead of using kwargs, we should just be able to do:
-            # user_data["user_id"] = user_data["_id"]
-            if "id" in kwargs:
-                user_data["user_id"] = kwargs["id"]
-            return User(**user_data)
+    user_data = await users_collection.find_one(
+        {"email": email},
+        projection=projection,
+        collation=get_email_collation(),
+    )
+    if user_data is None:
+        return None
+    return User(
+        email=user_data["email"],
+        password=user_data.get("password"),
+        admin=user_data.get("admin", False),
+        user_id=kwargs["id"] if "id" in kwargs else str(user_data["_id"]),
+    )
 
 
-def get_confirmed_user(email: str, password: str) -> User:
+async def get_confirmed_user(email: str, password: str) -> User:
     """
     Returns a "confirmed" `User` object , meaning: the user (`email`) exists
     in the database and the `password` is the correct password.
     """
-    user = get_user_from_db(email=email)
-    if not user:
+    user = await get_user_from_db(email=email)
+    if not user or user.password is None:
         return False
-    if not verify_password(password, user.password):
+    if not await verify_password(password, user.password):
         return False
     return user
 
 
-async def get_user_from_token(token: Annotated[str, Depends(oauth_bearer)] | Annotated[str, Depends(github_oauth_bearer)]) -> User | None:
+async def get_cached_user(token_data: dict) -> User | None:
     """
-    Return a `User` object representing the active `User`, validated via an access token.
+    Return the `User` for verified `token_data`, from the `user_cache` when possible
+    (so a hot session costs no DB round-trip), else from the db.
+    """
+    user = user_cache.get(token_data["id"])
+    if user is not None and user.email == token_data["username"]:
+        return user
+    user = await get_user_from_db(
+        email=token_data["username"], projection=AUTH_USER_PROJECTION, id=token_data["id"])
+    if user is not None:
+        user_cache.put(token_data["id"], user)
+    return user
+
+
+async def get_token_data(token: Annotated[str, Depends(oauth_bearer)]) -> dict:
+    """
+    Return the verified claims of an access token whose session hasn't been revoked.
+    The revocation check is answered in memory (see `backend.sessions.RevocationSet`).
     """
     token_data = verify_access_token(token=token)
-    if not token_data:
+    if not token_data or token_data["type"] == REFRESH_TOKEN_TYPE:
         raise credential_exception
-    user = get_user_from_db(email=token_data["username"], id=token_data["id"])
+    if await session_revocations.is_revoked(token_data["sid"]):
+        raise credential_exception
+    return token_data
+
+
+async def get_user_from_token(token: Annotated[str, Depends(oauth_bearer)]) -> User | None:
+    """
+    Return a `User` object representing the active `User`, validated via an access token.
+    """
+    token_data = await get_token_data(token)
+    user = await get_cached_user(token_data)
     if user is None:
         raise credential_exception
     return user
 
 
-async def get_admin_from_token(token: Annotated[str, Depends(oauth_bearer)] | Annotated[str, Depends(github_oauth_bearer)]) -> User | None:
+async def get_admin_from_token(token: Annotated[str, Depends(oauth_bearer)]) -> User | None:
     """
     Return a `User` object representing the active Admin-enabled `User`, validated via an access token.
+    Always read from the db (never the user cache), so revoking `admin` takes effect at once.
     """
-    token_data = verify_access_token(token=token)
-    if not token_data:
-        raise credential_exception
-    user = get_user_from_db(email=token_data["username"], id=token_data["id"])
-    if user and user.admin:  # If getting errors, remember: UPDATE USER MODEL to add bool `admin` and nuke db!!!
+    token_data = await get_token_data(token)
+    user = await get_user_from_db(
+        email=token_data["username"], projection=AUTH_USER_PROJECTION, id=token_data["id"])
+    if user and user.admin:
         return user
     else:
         raise credential_exception
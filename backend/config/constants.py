@@ -8,3 +8,18 @@ FRONTEND_AUTH_PAGES = "pages/auth"
 FRONTEND_APP_PAGES = "pages/app"
 FRONTEND_ADMIN_PAGES = "pages/admin"
 FRONTEND_USER_PAGES = "pages/user"
+
+TODO_PAGE_DEFAULT = 50
+TODO_PAGE_MAX = 1000
+TODO_BATCH_MAX = 1000
+TODO_SEARCH_MAX_LENGTH = 200
+
+ADMIN_PAGE_DEFAULT = 100
+ADMIN_PAGE_MAX = 1000
+# Documents per cursor batch (and per streamed chunk) in the admin exports
+EXPORT_BATCH_SIZE = 1000
+
+FRONTEND_STATIC = "frontend/static"
+FRONTEND_STATIC_BUILD = "frontend/static_build"
+STATIC_MANIFEST = "manifest.json"
+STATIC_URL_PREFIX = "/static"
@@ -1,34 +1,225 @@
 from pymongo.server_api import ServerApi
-from pymongo.mongo_client import MongoClient
-from pymongo.database import Database
-from pymongo.collection import Collection
+from motor.motor_asyncio import (
+    AsyncIOMotorClient,
+    AsyncIOMotorCollection,
+    AsyncIOMotorDatabase,
+)
+from pymongo.collation import Collation, CollationStrength
+from pymongo import ASCENDING, DESCENDING, TEXT, monitoring
 
-from dotenv import load_dotenv
-import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable
 
-# Load environment variables from the .env file
-load_dotenv()
+from backend.config.settings import get_settings
+from backend.metrics import MONGO_COMMAND_DURATION
 
-# Access environment variables
-MONGODB_URI = f"""{os.getenv("MONGO_URI")}/?retryWrites=true&w=majority"""
-USERS_DATABASE = f"""{os.getenv("USERS_DATABASE")}"""
-CONTENT_DATABASE = f"""{os.getenv("CONTENT_DATABASE")}"""
-USERS_COLLECTION = f"""{os.getenv("USERS_COLLECTION")}"""
-CONTENT_COLLECTION = f"""{os.getenv("CONTENT_COLLECTION")}"""
+# Collation used by the case-insensitive email index (and every query that wants to hit it)
+EMAIL_COLLATION = Collation(
+    locale="en", strength=CollationStrength.SECONDARY)
 
-# Create a new client and connect to the server
-primary_mongo_client = MongoClient(MONGODB_URI, server_api=ServerApi('1'))
-users_db = primary_mongo_client[USERS_DATABASE]
-content_db = primary_mongo_client[CONTENT_DATABASE]
+
+class DbOperationCounter:
+    """
+    Counts the Mongo commands issued while it is active (see `count_db_operations()`).
+    Counters nest: an operation counts towards every enclosing counter.
+    """
+
+    def __init__(self, parent: "DbOperationCounter | None" = None):
+        self.parent = parent
+        self.operations: list[tuple[str, str]] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.operations)
+
+    def record(self, command_name: str, collection: str) -> None:
+        self.operations.append((command_name, collection))
+        if self.parent is not None:
+            self.parent.record(command_name, collection)
+
+
+_db_operation_counter: ContextVar[DbOperationCounter | None] = ContextVar(
+    "db_operation_counter", default=None)
+
+
+@contextmanager
+def count_db_operations():
+    """
+    Count the Mongo commands issued by the current task (e.g. one request) while in the block.
+    Works because motor runs each operation in a copy of the caller's context.
+    """
+    counter = DbOperationCounter(parent=_db_operation_counter.get())
+    reset_token = _db_operation_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _db_operation_counter.reset(reset_token)
+
+
+class CommandTimingListener(monitoring.CommandListener):
+    """
+    Feeds `MONGO_COMMAND_DURATION` from the driver's command monitoring events.
+    The collection name only appears on the "started" event, so remember it until the reply.
+    """
+
+    def __init__(self):
+        self._pending: dict[tuple, str] = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        collection = target if isinstance(target, str) else "-"
+        self._pending[(event.connection_id, event.request_id)] = collection
+        counter = _db_operation_counter.get()
+        if counter is not None:
+            counter.record(event.command_name, collection)
+
+    def succeeded(self, event):
+        self._observe(event)
+
+    def failed(self, event):
+        self._observe(event)
+
+    def _observe(self, event):
+        collection = self._pending.pop(
+            (event.connection_id, event.request_id), "-")
+        MONGO_COMMAND_DURATION.labels(collection, event.command_name).observe(
+            event.duration_micros / 1_000_000)
+
+
+# The process-wide client; created on first use (normally by the app lifespan)
+_client: AsyncIOMotorClient | None = None
+
+
+def get_client() -> AsyncIOMotorClient:
+    """
+    Return the shared (asyncio-native) client, creating it on first use. Importing this
+    module never connects: the driver's monitor threads start when the client is created.
+    """
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(
+            get_settings().mongodb_uri,
+            server_api=ServerApi('1'),
+            event_listeners=[CommandTimingListener()],
+        )
+    return _client
+
+
+def set_client(client) -> None:
+    """
+    Use `client` instead of connecting to `MONGO_URI` (e.g. an in-memory stand-in for benchmarks).
+    """
+    global _client
+    _client = client
+
+
+def close_client() -> None:
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+async def ping_db() -> None:
+    await get_client().admin.command("ping")
+
+
+class LazyHandle:
+    """
+    Stands in for a database or collection that is looked up on the current client at first
+    use, so modules can hold `users_collection` etc. at import time without connecting.
+    """
+
+    def __init__(self, resolve: Callable[[AsyncIOMotorClient], Any]):
+        self._resolve = resolve
+        self._client = None
+        self._target = None
+
+    def _get(self):
+        client = get_client()
+        if self._client is not client:
+            self._target = self._resolve(client)
+            self._client = client
+        return self._target
+
+    def __getattr__(self, name: str):
+        return getattr(self._get(), name)
+
+    def __getitem__(self, name: str):
+        return self._get()[name]
+
+
+users_db = LazyHandle(lambda client: client[get_settings().users_database])
+content_db = LazyHandle(lambda client: client[get_settings().content_database])
 
 # Define access to our collections
-users_collection = users_db[USERS_COLLECTION]
-content_collection = content_db[CONTENT_COLLECTION]
+users_collection = LazyHandle(
+    lambda client: client[get_settings().users_database][get_settings().users_collection])
+content_collection = LazyHandle(
+    lambda client: client[get_settings().content_database][get_settings().content_collection])
+sessions_collection = LazyHandle(
+    lambda client: client[get_settings().users_database][get_settings().sessions_collection])
 
 
-def get_db(db_name: str) -> Database:
-    return primary_mongo_client[db_name]
+def get_db(db_name: str) -> AsyncIOMotorDatabase:
+    return get_client()[db_name]
 
 
-def get_collection(db: Database, collection_name: str) -> Collection:
+def get_collection(db: AsyncIOMotorDatabase, collection_name: str) -> AsyncIOMotorCollection:
     return db[collection_name]
+
+
+def get_email_collation() -> Collation | None:
+    """
+    Returns the collation that email lookups must use to match (and be served by) the email index.
+    """
+    return EMAIL_COLLATION if get_settings().users_email_case_insensitive else None
+
+
+async def ensure_indexes() -> None:
+    """
+    Create the indexes our queries rely on. Safe to call on every startup:
+    `create_index` is a no-op when an identical index already exists.
+    """
+    if get_settings().users_email_case_insensitive:
+        await users_collection.create_index(
+            [("email", ASCENDING)],
+            name="email_unique_ci",
+            unique=True,
+            collation=EMAIL_COLLATION,
+        )
+    else:
+        await users_collection.create_index(
+            [("email", ASCENDING)],
+            name="email_unique",
+            unique=True,
+        )
+    # Sessions: expire with their refresh token, list per user, poll for new revocations
+    await sessions_collection.create_index(
+        "expires_at", name="expires_at_ttl", expireAfterSeconds=0)
+    await sessions_collection.create_index(
+        [("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_id_created_at")
+    await sessions_collection.create_index(
+        "revoked_at", name="revoked_at", sparse=True)
+    # Serves the per-owner todo listing *and* its `_id` keyset pagination
+    await content_collection.create_index(
+        [("owner_id", ASCENDING), ("_id", ASCENDING)],
+        name="owner_id_id",
+    )
+    # Todo filters: by completion (also covers the summary counts), by name order, by text
+    await content_collection.create_index(
+        [("owner_id", ASCENDING), ("task_complete", ASCENDING), ("_id", ASCENDING)],
+        name="owner_id_task_complete_id",
+    )
+    await content_collection.create_index(
+        [("owner_id", ASCENDING), ("name", ASCENDING), ("_id", ASCENDING)],
+        name="owner_id_name_id",
+    )
+    # The `owner_id` prefix keeps each search inside one user's todos
+    await content_collection.create_index(
+        [("owner_id", ASCENDING), ("name", TEXT), ("description", TEXT)],
+        name="owner_id_text",
+    )
@@ -0,0 +1,146 @@
+import os
+from functools import lru_cache
+
+from dotenv import load_dotenv
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class Settings(BaseModel):
+    """
+    Every environment variable the app reads, parsed and typed in one place.
+    Field names are the lower-cased variable names (`LOG_LEVEL` -> `log_level`).
+    Use `get_settings()` rather than building this directly.
+    """
+    model_config = ConfigDict(alias_generator=str.upper, frozen=True)
+
+    # Server
+    server_host: str = "0.0.0.0"
+    server_port: int = 9393
+    server_reload: bool = False
+    server_env: str = "development"  # development | production
+    server_workers: int = 0  # 0 = CPU count in production, else 1
+    server_loop: str = "auto"  # auto | asyncio | uvloop
+    server_http: str = "auto"  # auto | h11 | httptools
+    server_keepalive_timeout: int = 5
+    server_backlog: int = 2048
+    server_max_requests: int = 0  # recycle a worker after N requests (0 = never)
+    server_graceful_timeout: int = 30
+    server_access_log: bool = False
+    metrics_enabled: bool = True
+    metrics_token: str | None = None  # `/metrics` is only served to `Authorization: Bearer <token>`
+
+    # Logging
+    log_level: int = 20
+    logger_root_name: str = "MyBadassApp"
+    log_format: str = "text"  # text | json
+    log_file: str = "logs/debug.log"
+    log_slow_request_ms: float = 500
+    log_sample_rate: float = 1.0
+    log_queue_max_size: int = 10000
+    log_queue_policy: str = "drop"  # drop | block
+    log_queue_block_timeout: float = 0.05
+    log_batch_size: int = 256
+    papertrail_host: str | None = None
+    papertrail_port: int | None = None
+
+    # Templates
+    templates_bytecode_cache_dir: str = ".cache/jinja"
+    templates_precompile: bool = True
+
+    # Database
+    mongo_uri: str = "mongodb://localhost:27017"
+    users_database: str = "sample_backend_users"
+    content_database: str = "sample_backend_content"
+    users_collection: str = "users_collection"
+    sessions_collection: str = "sessions"
+    content_collection: str = "content_collection"
+    todo_versions_collection: str = "todo_versions"
+    users_email_case_insensitive: bool = False
+
+    # Live todo updates (Server-Sent Events)
+    todo_events_source: str = "auto"  # auto | change_stream | local
+    todo_events_queue_size: int = 100
+    todo_events_heartbeat_seconds: float = 15
+
+    # Tokens
+    backend_secret_key: str | None = None
+    backend_algorithm: str = "HS256"
+    backend_access_token_expire_minutes: int = 30
+    backend_refresh_token_expire_days: int = 7
+    token_codec: str = "hs256"  # hs256 | jose | keyset
+    token_keyset_dir: str = "keys/jwt"
+    token_signing_kid: str | None = None
+    token_cache_max_entries: int = 10000
+    token_cache_ttl_seconds: float = 300
+
+    # Session revocation (per-worker filter)
+    session_revocation_refresh_seconds: float = 2
+    session_revocation_rebuild_seconds: float = 3600
+    session_revocation_bloom_capacity: int = 100_000
+    session_revocation_bloom_error_rate: float = 0.01
+
+    # User cache
+    user_cache_max_entries: int = 10000
+    user_cache_ttl_seconds: float = 60
+    user_cache_invalidation_channel: str = "none"  # none | mongo
+    user_cache_invalidation_collection: str = "user_cache_invalidations"
+
+    # Rate limits ("<attempts>/<seconds>")
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"  # memory | mongo
+    rate_limit_collection: str = "rate_limits"
+    rate_limit_trust_forwarded: bool = False
+    login_rate_limit_per_account: str = "10/300"
+    login_rate_limit_per_ip: str = "30/60"
+    register_rate_limit_per_account: str = "5/300"
+    register_rate_limit_per_ip: str = "10/300"
+
+    # Password hashing
+    hash_max_workers: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    hash_queue_timeout: float = 5
+
+    # Github OAuth
+    github_client_id: str | None = None
+    github_secret_key: str | None = None
+    github_authorize_url: str = "https://github.com/login/oauth/authorize"
+    github_token_url: str = "https://github.com/login/oauth/access_token"
+    github_api_url: str = "https://api.github.com"
+
+    # Outbound HTTP client
+    http_connect_timeout: float = 5
+    http_read_timeout: float = 10
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30
+    http_retries: int = 2
+    http_retry_backoff: float = 0.2
+    http_http2: bool = False
+
+    @property
+    def is_production(self) -> bool:
+        return self.server_env.lower() == "production"
+
+    @property
+    def mongodb_uri(self) -> str:
+        return f"{self.mongo_uri}/?retryWrites=true&w=majority"
+
+    def check(self) -> None:
+        """
+        Fail fast (at startup, not on the first login) when a required setting is missing.
+        """
+        if not self.backend_secret_key:
+            raise RuntimeError("BACKEND_SECRET_KEY is not set.")
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Load the `.env` file (once per process) and parse the environment into `Settings`.
+    Empty variables count as unset. Call `get_settings.cache_clear()` to re-read it.
+    """
+    load_dotenv()
+    names = {field.alias for field in Settings.model_fields.values()}
+    return Settings.model_validate({
+        key: value for key, value in os.environ.items()
+        if key in names and value != ""
+    })
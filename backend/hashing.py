@@ -0,0 +1,80 @@
+import asyncio
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from backend.config.settings import get_settings
+from backend.metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_QUEUE_WAIT
+from backend.log import get_logger
+logger = get_logger(__name__)
+
+# Hashing context
+bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class HashExecutor:
+    """
+    Runs bcrypt off the event loop on a dedicated thread pool (bcrypt releases the GIL).
+    At most `max_workers` hashes run at once; everyone else waits in line for up to
+    `queue_timeout` seconds and then gets a 503, so a login burst queues up instead of
+    freezing every other route on the worker.
+    Unset limits come from `HASH_MAX_WORKERS` / `HASH_QUEUE_TIMEOUT` when the pool first starts.
+    """
+
+    def __init__(self, max_workers: int | None = None, queue_timeout: float | None = None):
+        self.max_workers = max_workers
+        self.queue_timeout = queue_timeout
+        self._executor: ThreadPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+
+    def _ensure_started(self) -> None:
+        if self._executor is None:
+            if self.max_workers is None:
+                self.max_workers = get_settings().hash_max_workers
+            if self.queue_timeout is None:
+                self.queue_timeout = get_settings().hash_queue_timeout
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="bcrypt")
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        self._ensure_started()
+        time_start = perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Hash queue timeout after {self.queue_timeout}s; rejecting request.")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please try again.",
+                headers={"Retry-After": str(int(self.queue_timeout) or 1)},
+            )
+        PASSWORD_HASH_QUEUE_WAIT.observe(perf_counter() - time_start)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, _timed, fn, *args)
+        finally:
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._slots = None
+
+
+def _timed(fn: Callable[..., Any], *args) -> Any:
+    # Runs on the pool thread, so this times bcrypt itself and not the queueing
+    time_start = perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        PASSWORD_HASH_DURATION.labels(fn.__name__).observe(
+            perf_counter() - time_start)
+
+
+hash_executor = HashExecutor()
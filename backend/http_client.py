@@ -0,0 +1,96 @@
+import random
+import asyncio
+import importlib.util
+
+import httpx
+
+from backend.config.settings import get_settings
+
+from backend.log import get_logger
+logger = get_logger(__name__)
+
+# Upstream statuses worth another try (for idempotent requests)
+RETRY_STATUSES = {502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class SharedHTTPClient:
+    """
+    One pooled `httpx.AsyncClient` per worker, so outbound calls (e.g. to GitHub) reuse
+    keep-alive TCP/TLS connections instead of handshaking on every request.
+    Opened/closed by the app lifespan; created lazily if something needs it first.
+    """
+
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+
+    def _build(self) -> httpx.AsyncClient:
+        settings = get_settings()
+        http2 = settings.http_http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning(
+                "HTTP_HTTP2 is on but the `h2` package is missing; using HTTP/1.1.")
+            http2 = False
+        return httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(
+                settings.http_read_timeout, connect=settings.http_connect_timeout),
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry,
+            ),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = self._build()
+        return self._client
+
+    async def start(self) -> None:
+        self.client
+
+    async def stop(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        `httpx` request with retry and exponential backoff (plus jitter).
+        Idempotent requests are retried on transport errors and 502/503/504; anything else
+        (like the OAuth code exchange, which must not be replayed) only when the connection
+        could not be made in the first place.
+        """
+        retries = get_settings().http_retries
+        backoff = get_settings().http_retry_backoff
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            try:
+                response = await self.client.request(method, url, **kwargs)
+                if not (idempotent and response.status_code in RETRY_STATUSES) or attempt >= retries:
+                    return response
+                logger.info(
+                    f"Retrying {method} {url}: upstream returned {response.status_code}")
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                if attempt >= retries:
+                    raise
+                logger.info(f"Retrying {method} {url}: {e!r}")
+            except httpx.TransportError as e:
+                if not idempotent or attempt >= retries:
+                    raise
+                logger.info(f"Retrying {method} {url}: {e!r}")
+            delay = backoff * (2 ** attempt)
+            await asyncio.sleep(delay + random.uniform(0, delay))
+            attempt += 1
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+
+http_client = SharedHTTPClient()
@@ -1,14 +1,14 @@
-import sys
 import os
+import json
+import queue
+import atexit
 import logging
 from logging import Logger
-from logging.handlers import SysLogHandler
+from logging.handlers import SysLogHandler, QueueHandler, QueueListener
 import socket
 
-from dotenv import load_dotenv
-
-# Load environment variables from the .env file
-load_dotenv()
+from backend.config.settings import Settings, get_settings
+from backend.metrics import REGISTRY
 
 
 class ContextFilter(logging.Filter):
@@ -19,43 +19,229 @@ class ContextFilter(logging.Filter):
         return True
 
 
-# Get sysenvs
-LOG_LEVEL = int(os.getenv("LOG_LEVEL"))
-PAPERTRAIL_HOST = str(os.getenv("PAPERTRAIL_HOST"))
-PAPERTRAIL_PORT = int(os.getenv("PAPERTRAIL_PORT"))
-LOGGER_ROOT_NAME = str(os.getenv("LOGGER_ROOT_NAME"))
+# Attributes every `LogRecord` has; anything else on a record came in through `extra=`
+_RECORD_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {
+    "message", "asctime", "hostname"}
 
-# Create formatters
-formatter = logging.Formatter(
-    fmt="%(asctime)s (%(levelname)s) %(name)s [%(funcName)s, %(lineno)d]: %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
-papertrail_formatter = logging.Formatter(
-    fmt="%(asctime)s (%(hostname)s) %(name)s [%(funcName)s, %(lineno)d]: %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Compact one-object-per-line formatter, so log shippers don't have to re-parse free text.
+    Fields passed via `extra=` are included as top-level keys.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "func": record.funcName,
+            "line": record.lineno,
+            "msg": record.getMessage(),
+        }
+        if hasattr(record, "hostname"):
+            entry["host"] = record.hostname
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(",", ":"), default=str)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Hands records to the background listener through a bounded queue. When the queue is
+    full we either drop the record straight away (`drop`) or wait briefly for room (`block`)
+    before dropping it; either way the request path never waits on disk or network I/O.
+    """
+
+    def __init__(self, log_queue: queue.Queue, policy: str, block_timeout: float):
+        super().__init__(log_queue)
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            if self.policy == "block":
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            # Called from whichever thread logged the record
+            with self.lock:
+                self.dropped += 1
+
+
+class BatchFileHandler(logging.FileHandler):
+    """
+    `FileHandler` that doesn't flush after every record; the listener flushes once per batch.
+    """
+
+    def emit(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class BatchingQueueListener(QueueListener):
+    """
+    `QueueListener` that drains up to `batch_size` records per wake-up and then
+    flushes its handlers once, instead of once per record.
+    """
+
+    def __init__(self, log_queue, *handlers, batch_size: int = 256, respect_handler_level: bool = False,
+                 sentinel_timeout: float = 5.0):
+        super().__init__(log_queue, *handlers,
+                         respect_handler_level=respect_handler_level)
+        self.batch_size = batch_size
+        self.sentinel_timeout = sentinel_timeout
+        self.batches = 0
+
+    def enqueue_sentinel(self):
+        # The queue is bounded and may well be full at shutdown; wait for the listener to make
+        # room (the default `put_nowait` would raise `queue.Full` and skip the join)
+        self.queue.put(self._sentinel, timeout=self.sentinel_timeout)
+
+    def _monitor(self):
+        q = self.queue
+        while True:
+            batch = [q.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            stop = False
+            for record in batch:
+                if record is self._sentinel:
+                    stop = True
+                else:
+                    self.handle(record)
+                q.task_done()
+            for handler in self.handlers:
+                handler.flush()
+            self.batches += 1
+            if stop:
+                break
+
+
+def build_formatters(log_format: str) -> tuple[logging.Formatter, logging.Formatter]:
+    """
+    Returns the (local, papertrail) formatters for `LOG_FORMAT`.
+    """
+    if log_format.lower() == "json":
+        formatter = JsonLinesFormatter(datefmt="%Y-%m-%dT%H:%M:%S")
+        return formatter, formatter
+    formatter = logging.Formatter(
+        fmt="%(asctime)s (%(levelname)s) %(name)s [%(funcName)s, %(lineno)d]: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S"
+    )
+    papertrail_formatter = logging.Formatter(
+        fmt="%(asctime)s (%(hostname)s) %(name)s [%(funcName)s, %(lineno)d]: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S"
+    )
+    return formatter, papertrail_formatter
+
+
+def build_handlers(settings: Settings) -> list[logging.Handler]:
+    formatter, papertrail_formatter = build_formatters(settings.log_format)
+    handlers = []
+
+    # io_stream_handler = logging.StreamHandler(sys.stdout)
+    # io_stream_handler.setFormatter(formatter)
+    # handlers.append(io_stream_handler)
+
+    log_dir = os.path.dirname(settings.log_file)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    file_handler = BatchFileHandler(settings.log_file)
+    file_handler.setFormatter(formatter)
+    handlers.append(file_handler)
+
+    if settings.papertrail_host and settings.papertrail_port:
+        papertrail_handler = SysLogHandler(
+            address=(settings.papertrail_host, settings.papertrail_port))
+        papertrail_handler.addFilter(ContextFilter())
+        papertrail_handler.setFormatter(papertrail_formatter)
+        handlers.append(papertrail_handler)
+    return handlers
+
+
+# Every logger writes to the queue; the listener thread (started by `start_logging()`,
+# normally from the app lifespan) does the actual I/O. Until then records wait in the queue.
+log_queue = queue.Queue(maxsize=get_settings().log_queue_max_size)
+queue_handler = BoundedQueueHandler(
+    log_queue,
+    policy=get_settings().log_queue_policy.lower(),
+    block_timeout=get_settings().log_queue_block_timeout,
 )
+queue_listener: BatchingQueueListener | None = None
+
+
+def start_logging() -> bool:
+    """
+    Open the log file (and the Papertrail socket, if configured) and start writing queued records.
+    Returns False if logging was already started (so the caller shouldn't stop it).
+    """
+    global queue_listener
+    if queue_listener is not None:
+        return False
+    queue_listener = BatchingQueueListener(
+        log_queue,
+        *build_handlers(get_settings()),
+        batch_size=get_settings().log_batch_size,
+    )
+    queue_listener.start()
+    atexit.register(stop_logging)
+    return True
+
+
+def stop_logging() -> None:
+    """
+    Write out whatever is still queued, then close the handlers.
+    """
+    global queue_listener
+    if queue_listener is None:
+        return
+    try:
+        queue_listener.stop()
+    finally:
+        for handler in queue_listener.handlers:
+            handler.close()
+        queue_listener = None
+
+
+def get_log_stats() -> dict:
+    """
+    Counters for the logging pipeline (records waiting, records dropped, batches written).
+    """
+    return {
+        "queued": log_queue.qsize(),
+        "dropped": queue_handler.dropped,
+        "batches": queue_listener.batches if queue_listener is not None else 0,
+    }
 
-# Create handlers
-io_stream_handler = logging.StreamHandler(sys.stdout)
-file_handler = logging.FileHandler("logs/debug.log")
-papertrail_handler = SysLogHandler(address=(PAPERTRAIL_HOST, PAPERTRAIL_PORT))
-papertrail_handler.addFilter(ContextFilter())
 
-# Format handlers
-io_stream_handler.setFormatter(formatter)
-file_handler.setFormatter(formatter)
-papertrail_handler.setFormatter(papertrail_formatter)
+REGISTRY.register_collector(lambda: [
+    ("log_queue_depth", "gauge", "Log records waiting to be written.",
+     [({}, log_queue.qsize())]),
+    ("log_records_dropped_total", "counter", "Log records dropped because the queue was full.",
+     [({}, queue_handler.dropped)]),
+])
 
 
 # Get logger
 def get_logger(name: str) -> Logger:
-    logger = logging.getLogger(f"""{LOGGER_ROOT_NAME}.{name}""")
-    # Add the handlers to the logger
+    logger = logging.getLogger(f"""{get_settings().logger_root_name}.{name}""")
+    # Add the queue handler to the logger
     logger.handlers = [
-        # io_stream_handler,
-        file_handler,
-        papertrail_handler,
+        queue_handler,
     ]
     # Set log-level
-    logger.setLevel(LOG_LEVEL)
+    logger.setLevel(get_settings().log_level)
     return logger
@@ -1,21 +1,76 @@
-import time
-from fastapi import Request
+import random
+from time import perf_counter_ns
+from urllib.parse import parse_qsl
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
 from backend.log import get_logger
+from backend.config.db import count_db_operations
+from backend.config.settings import get_settings
 
 logger = get_logger(__name__)
 
 
-async def log_route(request: Request, call_next):
-    time_start = time.time()
-    response = await call_next(request)
-    time_end = time.time() - time_start
-
-    log_dict = {
-        "url": request.url.path,
-        "method": request.method,
-    }
-    if request.query_params._dict:
-        log_dict["query_params"] = request.query_params._dict
-    log_dict["time_to_complete"] = time_end
-    logger.info(log_dict, extra=log_dict)
-    return response
+class RouteTimingMiddleware:
+    """
+    Pure ASGI middleware that logs one record per HTTP request: path, method, query params,
+    status code, response size and time to complete. Unlike `BaseHTTPMiddleware` it doesn't
+    spawn a task or re-wrap the response stream, so streaming responses pass straight through.
+    Requests slower than `slow_request_ms` are always logged (as warnings); faster ones are
+    sampled at `sample_rate` (defaults: `LOG_SLOW_REQUEST_MS` / `LOG_SAMPLE_RATE`).
+    """
+
+    def __init__(self, app: ASGIApp, slow_request_ms: float | None = None, sample_rate: float | None = None):
+        settings = get_settings()
+        if slow_request_ms is None:
+            slow_request_ms = settings.log_slow_request_ms
+        if sample_rate is None:
+            sample_rate = settings.log_sample_rate
+        self.app = app
+        self.slow_request_ns = int(slow_request_ms * 1_000_000)
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        time_start = perf_counter_ns()
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        with count_db_operations() as db_operations:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                time_end = perf_counter_ns() - time_start
+                slow = time_end >= self.slow_request_ns
+                if slow or random.random() < self.sample_rate:
+                    self.log_request(scope, status_code, response_size,
+                                     time_end, slow, db_operations.count)
+
+    def log_request(self, scope: Scope, status_code: int, response_size: int, time_end: int, slow: bool, db_operations: int) -> None:
+        log_dict = {
+            "url": scope["path"],
+            "method": scope["method"],
+        }
+        if scope.get("query_string"):
+            log_dict["query_params"] = dict(
+                parse_qsl(scope["query_string"].decode("latin-1")))
+        log_dict["status_code"] = status_code
+        log_dict["response_size"] = response_size
+        log_dict["db_operations"] = db_operations
+        log_dict["time_to_complete"] = time_end / 1_000_000_000
+        if slow:
+            log_dict["slow"] = True
+            logger.warning(log_dict, extra=log_dict)
+        else:
+            logger.info(log_dict, extra=log_dict)
@@ -0,0 +1,52 @@
+from time import perf_counter
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+
+
+def get_route_label(scope: Scope) -> str:
+    """
+    Label requests by their route *template* (`/api/v1/todo/{id}`), never the raw path,
+    so the number of series stays bounded.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" in scope:
+        # A mounted app (e.g. `/static`) rather than an API route
+        return f"{scope.get('root_path', '')}/{{path}}"
+    return "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware feeding the per-route latency histogram and the in-flight gauge.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.in_flight = HTTP_REQUESTS_IN_FLIGHT.labels()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.in_flight.inc()
+        time_start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.in_flight.dec()
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"], get_route_label(scope), str(status_code)
+            ).observe(perf_counter() - time_start)
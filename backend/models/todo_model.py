@@ -1,8 +1,92 @@
+from enum import Enum
+
 from pydantic import BaseModel, Field
 
+from backend.config.constants import TODO_BATCH_MAX
+
 
 class Todo(BaseModel):
     name: str
     description: str
     task_complete: bool
     owner_id: str
+
+
+class TodoItem(BaseModel):
+    id: str
+    name: str
+    description: str
+    task_complete: bool
+
+
+class TodoPage(BaseModel):
+    todos: list[TodoItem]
+    # Pass back as `after` to get the next page; `None` when there are no more todos
+    next_cursor: str | None = None
+
+
+class TodoSort(str, Enum):
+    # `created` is insertion order (`_id`); a leading `-` reverses the order
+    created = "created"
+    created_desc = "-created"
+    name = "name"
+    name_desc = "-name"
+
+
+class TodoSummary(BaseModel):
+    total: int
+    completed: int
+    open: int
+
+
+class AdminTodoItem(TodoItem):
+    owner_id: str
+
+
+class AdminTodoPage(BaseModel):
+    todos: list[AdminTodoItem]
+    next_cursor: str | None = None
+
+
+class TodoOwnerStats(BaseModel):
+    owner_id: str
+    total: int
+    completed: int
+    open: int
+
+
+class TodoStatsPage(BaseModel):
+    stats: list[TodoOwnerStats]
+    # The last `owner_id` (user id) of this page; `None` when there are no more users
+    next_cursor: str | None = None
+
+
+class TodoBatchCreate(BaseModel):
+    todos: list[Todo] = Field(min_length=1, max_length=TODO_BATCH_MAX)
+    # Ordered batches stop at the first failing item; unordered ones try every item
+    ordered: bool = True
+
+
+class TodoBatchUpdate(BaseModel):
+    todos: list[TodoItem] = Field(min_length=1, max_length=TODO_BATCH_MAX)
+    ordered: bool = True
+
+
+class TodoBatchIds(BaseModel):
+    ids: list[str] = Field(min_length=1, max_length=TODO_BATCH_MAX)
+    ordered: bool = True
+
+
+class TodoBatchItemResult(BaseModel):
+    index: int
+    id: str | None = None
+    ok: bool
+    error: str | None = None
+
+
+class TodoBatchResult(BaseModel):
+    results: list[TodoBatchItemResult]
+    inserted: int = 0
+    matched: int = 0
+    modified: int = 0
+    deleted: int = 0
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel, Field
 # from typing import List
 
@@ -9,9 +11,41 @@ class UserProfile(BaseModel):
 
 class User(BaseModel):
     email: str
-    password: str
+    # Only loaded to check a login (see `backend.auth.USER_PROJECTION`)
+    password: str | None = None
     user_id: str | None = None
-    refresh_token: str | None = None
     # active_session_tokens: List[str] | None = []
     # active_refresh_tokens: List[str] | None = []
-    # admin : bool | None = False
+    admin: bool | None = False
+
+
+class UserPublic(BaseModel):
+    """
+    What `GET /user/profile` returns: never the password hash.
+    """
+    email: str
+    user_id: str
+
+
+class AdminUserItem(BaseModel):
+    id: str
+    email: str
+    admin: bool = False
+
+
+class AdminUserPage(BaseModel):
+    users: list[AdminUserItem]
+    # Pass back as `after` to get the next page; `None` when there are no more users
+    next_cursor: str | None = None
+
+
+class SessionInfo(BaseModel):
+    """
+    One logged-in device, as listed by `GET /user/sessions`.
+    """
+    id: str
+    created_at: datetime
+    expires_at: datetime
+    user_agent: str | None = None
+    ip: str | None = None
+    current: bool = False
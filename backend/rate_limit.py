@@ -0,0 +1,168 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, Request, status
+from pymongo import ReturnDocument
+
+from backend.config.db import users_db
+from backend.config.settings import get_settings
+from backend.metrics import RATE_LIMIT_REJECTIONS
+
+from backend.log import get_logger
+logger = get_logger(__name__)
+
+
+def parse_limit(limit: str) -> tuple[int, float]:
+    requests, _, seconds = limit.partition("/")
+    return int(requests), float(seconds)
+
+
+def sliding_window_estimate(previous: int, current: int, elapsed: float, window: float) -> float:
+    """
+    Sliding-window counter: the previous fixed window's count, weighted by how much of it
+    still overlaps the sliding window, plus everything in the current fixed window.
+    """
+    return previous * (1 - elapsed / window) + current
+
+
+class InMemoryRateLimitBackend:
+    """
+    Per-worker sliding-window counters. Every attempt counts, allowed or not.
+    Keys are kept in least-recently-hit order, so dead counters are dropped (and, past
+    `max_keys`, the stalest live ones evicted) from the front in O(1) per hit.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> [window index, count in that window, count in the window before, expires at]
+        self._windows: OrderedDict[str, list] = OrderedDict()
+
+    async def setup(self) -> None:
+        pass
+
+    async def hit(self, key: str, window: float) -> tuple[float, float]:
+        """
+        Count one attempt for `key`; returns `(estimated attempts in the last window, seconds elapsed in the current fixed window)`.
+        """
+        now = time.time()
+        index = int(now // window)
+        entry = self._windows.get(key)
+        if entry is None or entry[0] < index - 1:
+            entry = [index, 0, 0, 0.0]
+        elif entry[0] == index - 1:
+            entry = [index, 0, entry[1], 0.0]
+        entry[1] += 1
+        # Each limiter has its own window, so the expiry is absolute: this window's count
+        # still weighs on the next one, and is dead after that
+        entry[3] = (index + 2) * window
+        self._windows[key] = entry
+        self._windows.move_to_end(key)
+        self._evict(now)
+        elapsed = now - index * window
+        return sliding_window_estimate(entry[2], entry[1], elapsed, window), elapsed
+
+    def _evict(self, now: float) -> None:
+        windows = self._windows
+        while windows:
+            key, entry = next(iter(windows.items()))
+            if entry[3] > now and len(windows) <= self.max_keys:
+                break
+            windows.popitem(last=False)
+
+
+class MongoRateLimitBackend:
+    """
+    Sliding-window counters shared by every worker (and host), stored as one small
+    document per key and fixed window. A TTL index cleans up old windows.
+    """
+
+    def __init__(self, collection_name: str):
+        self.collection_name = collection_name
+
+    @property
+    def collection(self):
+        return users_db[self.collection_name]
+
+    async def setup(self) -> None:
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def hit(self, key: str, window: float) -> tuple[float, float]:
+        now = time.time()
+        index = int(now // window)
+        current = await self.collection.find_one_and_update(
+            {"_id": f"{key}:{index}"},
+            {
+                "$inc": {"count": 1},
+                "$setOnInsert": {"expires_at": datetime.utcnow() + timedelta(seconds=2 * window)},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        previous = await self.collection.find_one({"_id": f"{key}:{index - 1}"})
+        elapsed = now - index * window
+        return sliding_window_estimate(previous["count"] if previous else 0, current["count"], elapsed, window), elapsed
+
+
+class RateLimiter:
+    def __init__(self, name: str, limit: str, backend):
+        self.name = name
+        self.limit, self.window = parse_limit(limit)
+        self.backend = backend
+
+    async def check(self, key: str) -> None:
+        """
+        Count an attempt for `key`, raising a 429 (with `Retry-After`) if it is over the limit.
+        """
+        attempts, elapsed = await self.backend.hit(f"{self.name}:{key}", self.window)
+        if attempts > self.limit:
+            RATE_LIMIT_REJECTIONS.labels(self.name).inc()
+            logger.warning(f"Rate limit '{self.name}' exceeded for {key}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, please try again later.",
+                headers={"Retry-After": str(max(1, int(self.window - elapsed)))},
+            )
+
+
+def get_client_ip(request: Request) -> str:
+    if get_settings().rate_limit_trust_forwarded:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+if get_settings().rate_limit_backend.lower() == "mongo":
+    rate_limit_backend = MongoRateLimitBackend(get_settings().rate_limit_collection)
+else:
+    rate_limit_backend = InMemoryRateLimitBackend()
+
+login_ip_limiter = RateLimiter(
+    "login-ip", get_settings().login_rate_limit_per_ip, rate_limit_backend)
+login_account_limiter = RateLimiter(
+    "login-account", get_settings().login_rate_limit_per_account, rate_limit_backend)
+register_ip_limiter = RateLimiter(
+    "register-ip", get_settings().register_rate_limit_per_ip, rate_limit_backend)
+register_account_limiter = RateLimiter(
+    "register-account", get_settings().register_rate_limit_per_account, rate_limit_backend)
+
+
+async def limit_login(request: Request, account: str) -> None:
+    """
+    Throttle login attempts per client IP and per account. Runs before any bcrypt work.
+    """
+    if not get_settings().rate_limit_enabled:
+        return
+    await login_ip_limiter.check(get_client_ip(request))
+    await login_account_limiter.check(account.strip().lower())
+
+
+async def limit_register(request: Request, account: str) -> None:
+    """
+    Throttle registrations per client IP and per account. Runs before any bcrypt work.
+    """
+    if not get_settings().rate_limit_enabled:
+        return
+    await register_ip_limiter.check(get_client_ip(request))
+    await register_account_limiter.check(account.strip().lower())
@@ -0,0 +1,206 @@
+import csv
+import io
+from enum import Enum
+
+import orjson
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+
+from backend.auth import get_admin_from_token
+from backend.models.todo_model import AdminTodoPage, TodoStatsPage
+from backend.models.user_model import AdminUserPage
+from backend.config.db import content_collection, users_collection
+from backend.config.constants import (
+    ADMIN_PAGE_DEFAULT,
+    ADMIN_PAGE_MAX,
+    API_PREFIX,
+    EXPORT_BATCH_SIZE,
+)
+from backend.routes.todo_routes import TODO_PROJECTION, parse_cursor, todo_item
+
+from backend.log import get_logger
+logger = get_logger(__name__)
+
+
+# Every route here needs an admin (`"admin": true` on the user document, see `make_admin.py`)
+admin_router = APIRouter(
+    prefix=f"{API_PREFIX}/admin",
+    tags=["admin"],
+    dependencies=[Depends(get_admin_from_token)],
+)
+
+ADMIN_USER_PROJECTION = {"email": 1, "admin": 1}
+ADMIN_TODO_PROJECTION = {**TODO_PROJECTION, "owner_id": 1}
+
+USER_EXPORT_FIELDS = ["id", "email", "admin"]
+TODO_EXPORT_FIELDS = ["id", "owner_id", "name", "description", "task_complete"]
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+def admin_user_item(user_data: dict) -> dict:
+    return {
+        "id": str(user_data["_id"]),
+        "email": user_data["email"],
+        "admin": user_data.get("admin") or False,
+    }
+
+
+def admin_todo_item(todo_data: dict) -> dict:
+    return {**todo_item(todo_data), "owner_id": todo_data["owner_id"]}
+
+
+async def keyset_page(collection, query: dict, projection: dict, after: str | None, limit: int, to_item) -> tuple[list[dict], str | None]:
+    """
+    One `_id`-ordered page of `collection` (plus the next cursor), like the todo listing.
+    """
+    after_id = parse_cursor(after)
+    if after_id is not None:
+        query = {**query, "_id": {"$gt": after_id}}
+    cursor = collection.find(query, projection=projection).sort("_id", 1).limit(limit + 1)
+    items = [to_item(document) async for document in cursor]
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = items[-1]["id"]
+    return items, next_cursor
+
+
+# ------------------------------------------------------------------------
+# LISTING SECTION (keyset pagination, as in `GET /api/v1/todo/`)
+# ------------------------------------------------------------------------
+
+@admin_router.get("/users", response_model=AdminUserPage)
+async def list_users(
+    limit: int = Query(default=ADMIN_PAGE_DEFAULT, ge=1, le=ADMIN_PAGE_MAX),
+    after: str | None = None,
+):
+    """
+    One page of every user, in `_id` order.
+    """
+    users, next_cursor = await keyset_page(
+        users_collection, {}, ADMIN_USER_PROJECTION, after, limit, admin_user_item)
+    return ORJSONResponse({"users": users, "next_cursor": next_cursor})
+
+
+@admin_router.get("/todos", response_model=AdminTodoPage)
+async def list_todos(
+    limit: int = Query(default=ADMIN_PAGE_DEFAULT, ge=1, le=ADMIN_PAGE_MAX),
+    after: str | None = None,
+    owner_id: str | None = None,
+):
+    """
+    One page of every todo (or just `owner_id`'s, served by the `owner_id_id` index), in `_id` order.
+    """
+    query = {} if owner_id is None else {"owner_id": owner_id}
+    todos, next_cursor = await keyset_page(
+        content_collection, query, ADMIN_TODO_PROJECTION, after, limit, admin_todo_item)
+    return ORJSONResponse({"todos": todos, "next_cursor": next_cursor})
+
+
+@admin_router.get("/stats", response_model=TodoStatsPage)
+async def list_todo_stats(
+    limit: int = Query(default=ADMIN_PAGE_DEFAULT, ge=1, le=ADMIN_PAGE_MAX),
+    after: str | None = None,
+):
+    """
+    Todo counts (total / completed / open) per user, one page of users at a time (users without
+    todos count zero). The page of owners is picked first, from the users' `_id` index, so the
+    one aggregation that follows only reads those owners' todos (off the
+    `owner_id_task_complete_id` index): a page costs O(its own todos), not O(every todo).
+    """
+    query = {}
+    after_id = parse_cursor(after)
+    if after_id is not None:
+        query["_id"] = {"$gt": after_id}
+    cursor = users_collection.find(query, projection={"_id": 1}).sort("_id", 1).limit(limit + 1)
+    owner_ids = [str(user_data["_id"]) async for user_data in cursor]
+    next_cursor = None
+    if len(owner_ids) > limit:
+        owner_ids = owner_ids[:limit]
+        next_cursor = owner_ids[-1]
+
+    pipeline = [
+        {"$match": {"owner_id": {"$in": owner_ids}}},
+        {"$group": {
+            "_id": "$owner_id",
+            "total": {"$sum": 1},
+            "completed": {"$sum": {"$cond": ["$task_complete", 1, 0]}},
+        }},
+    ]
+    counts = {group["_id"]: group async for group in content_collection.aggregate(pipeline)}
+    stats = []
+    for owner_id in owner_ids:
+        group = counts.get(owner_id, {"total": 0, "completed": 0})
+        stats.append({
+            "owner_id": owner_id,
+            "total": group["total"],
+            "completed": group["completed"],
+            "open": group["total"] - group["completed"],
+        })
+    return ORJSONResponse({"stats": stats, "next_cursor": next_cursor})
+
+
+# ------------------------------------------------------------------------
+# EXPORT SECTION (streamed, one cursor batch at a time)
+# ------------------------------------------------------------------------
+
+async def export_chunks(cursor, to_item, fields: list[str], format: ExportFormat):
+    """
+    Yield the export one cursor batch at a time, so memory use is bounded by `EXPORT_BATCH_SIZE`
+    however many documents there are.
+    """
+    exported = 0
+    try:
+        if format == ExportFormat.csv:
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=fields, lineterminator="\n")
+            writer.writeheader()
+            yield buffer.getvalue()
+        while batch := await cursor.to_list(length=EXPORT_BATCH_SIZE):
+            items = [to_item(document) for document in batch]
+            if format == ExportFormat.csv:
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=fields, lineterminator="\n")
+                writer.writerows(items)
+                yield buffer.getvalue()
+            else:
+                yield b"".join(orjson.dumps(item) + b"\n" for item in items)
+            exported += len(batch)
+        logger.info(f"Admin export finished: {exported} documents.")
+    finally:
+        # The client may have gone away mid-export; don't leave the server-side cursor open
+        await cursor.close()
+
+
+def export_response(name: str, cursor, to_item, fields: list[str], format: ExportFormat) -> StreamingResponse:
+    media_type = "text/csv" if format == ExportFormat.csv else "application/x-ndjson"
+    return StreamingResponse(
+        export_chunks(cursor, to_item, fields, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{format.value}"'},
+    )
+
+
+@admin_router.get("/export/users")
+async def export_users(format: ExportFormat = ExportFormat.ndjson):
+    """
+    Every user (id, email, admin) as NDJSON or CSV, streamed.
+    """
+    cursor = users_collection.find({}, projection=ADMIN_USER_PROJECTION).sort(
+        "_id", 1).batch_size(EXPORT_BATCH_SIZE)
+    return export_response("users", cursor, admin_user_item, USER_EXPORT_FIELDS, format)
+
+
+@admin_router.get("/export/todos")
+async def export_todos(format: ExportFormat = ExportFormat.ndjson, owner_id: str | None = None):
+    """
+    Every todo (or just `owner_id`'s) as NDJSON or CSV, streamed.
+    """
+    query = {} if owner_id is None else {"owner_id": owner_id}
+    cursor = content_collection.find(query, projection=ADMIN_TODO_PROJECTION).sort(
+        "_id", 1).batch_size(EXPORT_BATCH_SIZE)
+    return export_response("todos", cursor, admin_todo_item, TODO_EXPORT_FIELDS, format)
@@ -1,15 +1,13 @@
 from fastapi import APIRouter, Request, status
-from fastapi.templating import Jinja2Templates
 
 from backend.config.constants import API_PREFIX
+from backend.templating import templates
 
 jinja_router = APIRouter(
     prefix=f"/jinja",
     tags=["jinja2-template test routes"],
 )
 
-templates = Jinja2Templates(directory="frontend/templates")
-
 MA_LIST = [
     {
         "name": "Lemon Sour Diesel",
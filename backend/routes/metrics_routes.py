@@ -0,0 +1,38 @@
+import hmac
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from backend.config.settings import get_settings
+from backend.metrics import REGISTRY
+
+
+def require_metrics_token(authorization: str | None = Header(default=None)) -> None:
+    """
+    The metrics give away traffic and security-relevant timings, so only a scraper holding
+    `METRICS_TOKEN` gets them; with no token configured the endpoint doesn't exist.
+    """
+    token = get_settings().metrics_token
+    if not token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    scheme, _, credentials = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(credentials.encode(), token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+metrics_router = APIRouter(
+    tags=["metrics"],
+    dependencies=[Depends(require_metrics_token)],
+)
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    """
+    Prometheus text exposition of every metric in this worker.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
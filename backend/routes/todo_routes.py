@@ -1,15 +1,50 @@
-from fastapi import APIRouter, Depends, status
+import json
+import time
+import base64
+import asyncio
+import binascii
 
-from backend.auth import get_confirmed_user, bcrypt_context
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
-from backend.models.todo_model import Todo
+from backend.auth import get_token_data, get_user_from_token
+
+from backend.models.todo_model import (
+    Todo,
+    TodoItem,
+    TodoPage,
+    TodoSort,
+    TodoSummary,
+    TodoBatchCreate,
+    TodoBatchUpdate,
+    TodoBatchIds,
+    TodoBatchItemResult,
+    TodoBatchResult,
+)
 from backend.models.user_model import User
 
 from backend.config.db import content_collection
-from backend.config.constants import API_PREFIX
+from backend.config.settings import get_settings
+from backend.sessions import session_revocations
+from backend.todo_events import (
+    EXPIRED_EVENT,
+    RESYNC_EVENT,
+    format_sse,
+    record_todo_change,
+    todo_event_broker,
+)
+from backend.todo_versions import etag_matches, get_todo_version, make_etag
+from backend.config.constants import (
+    API_PREFIX,
+    TODO_PAGE_DEFAULT,
+    TODO_PAGE_MAX,
+    TODO_SEARCH_MAX_LENGTH,
+)
 
 from bson import ObjectId
-from typing import List
+from bson.errors import InvalidId
+from pymongo import InsertOne, UpdateOne, DeleteOne
+from pymongo.errors import BulkWriteError
 
 todo_router = APIRouter(
     prefix=f"{API_PREFIX}/todo",
@@ -17,38 +52,383 @@ todo_router = APIRouter(
 )
 
 
-@todo_router.get("/", status_code=status.HTTP_200_OK)
-async def get_todos(current_user: User = Depends(get_confirmed_user)) -> List[dict]:
-    return_list = []
-    for todo_data in content_collection.find():
-        if todo_data["owner_id"] == current_user.user_id:
-            todo = {
-                "id": str(todo_data["_id"]),
-                "name": todo_data["name"],
-                "description": todo_data["description"],
-                "task_complete": todo_data["task_complete"],
-            }
-            return_list.append(todo)
-    return return_list
+def invalid_cursor(after: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Invalid cursor: {after}",
+    )
+
+
+def parse_cursor(after: str | None) -> ObjectId | None:
+    """
+    Turn the `after` cursor handed out in `TodoPage.next_cursor` back into an `_id`.
+    """
+    if after is None:
+        return None
+    try:
+        return ObjectId(after)
+    except (InvalidId, TypeError):
+        raise invalid_cursor(after)
+
+
+def make_name_cursor(name: str, id: str) -> str:
+    """
+    Cursor for name-ordered pages: the last todo's `(name, _id)`, since names aren't unique.
+    """
+    return base64.urlsafe_b64encode(json.dumps([name, id]).encode()).decode()
+
+
+def parse_name_cursor(after: str) -> tuple[str, ObjectId]:
+    try:
+        name, id = json.loads(base64.urlsafe_b64decode(after.encode()))
+        if not isinstance(name, str):
+            raise TypeError
+        return name, ObjectId(id)
+    except (binascii.Error, ValueError, TypeError, InvalidId):
+        raise invalid_cursor(after)
+
+
+# Only the fields a `TodoItem` returns (`owner_id` is implied by the query)
+TODO_PROJECTION = {"name": 1, "description": 1, "task_complete": 1}
+
+
+def todo_item(todo_data: dict) -> dict:
+    """
+    A todo document from `content_collection` (fetched with `TODO_PROJECTION`) in `TodoItem` shape.
+    """
+    return {
+        "id": str(todo_data["_id"]),
+        "name": todo_data["name"],
+        "description": todo_data["description"],
+        "task_complete": todo_data["task_complete"],
+    }
+
+
+def build_todo_query(owner_id: str, task_complete: bool | None, q: str | None) -> dict:
+    query = {"owner_id": owner_id}
+    if task_complete is not None:
+        query["task_complete"] = task_complete
+    if q:
+        # Served by the `owner_id_text` index (matches whole words/stems, not substrings)
+        query["$text"] = {"$search": q}
+    return query
+
+
+@todo_router.get("/", status_code=status.HTTP_200_OK, response_model=TodoPage)
+async def get_todos(
+    request: Request,
+    limit: int = Query(default=TODO_PAGE_DEFAULT, ge=1, le=TODO_PAGE_MAX),
+    after: str | None = None,
+    task_complete: bool | None = None,
+    q: str | None = Query(default=None, max_length=TODO_SEARCH_MAX_LENGTH),
+    sort: TodoSort = TodoSort.created,
+    if_none_match: str | None = Header(default=None),
+    current_user: User = Depends(get_user_from_token),
+) -> Response:
+    """
+    Returns one page of the current user's todos, oldest first by default.
+    Filter with `task_complete` and `q` (text search over name & description); order with
+    `sort` (`created`, `-created`, `name`, `-name`).
+    Uses keyset pagination on the sort key (served by the `owner_id_*` indexes), so the cost
+    of a page depends on `limit`, not on how many todos exist in total.
+    Supports conditional GETs: if the list hasn't changed since the client's `ETag`,
+    answers `304 Not Modified` without querying the todos at all.
+    Documents come straight from our own collection, so the page is serialized as-is
+    (with orjson) instead of being validated into `TodoItem`s and then again as a `TodoPage`.
+    """
+    version = await get_todo_version(current_user.user_id)
+    etag = make_etag(current_user.user_id, version, request.url.query)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(etag, if_none_match):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    query = build_todo_query(current_user.user_id, task_complete, q)
+    direction = -1 if sort.value.startswith("-") else 1
+    by_name = sort in (TodoSort.name, TodoSort.name_desc)
+    op = "$lt" if direction == -1 else "$gt"
+    if after is not None:
+        if by_name:
+            after_name, after_id = parse_name_cursor(after)
+            query["$or"] = [
+                {"name": {op: after_name}},
+                {"name": after_name, "_id": {op: after_id}},
+            ]
+        else:
+            query["_id"] = {op: parse_cursor(after)}
+    sort_keys = [("name", direction), ("_id", direction)] if by_name else [("_id", direction)]
+
+    # Ask for one extra document to find out whether there is a next page
+    cursor = content_collection.find(query, projection=TODO_PROJECTION).sort(
+        sort_keys).limit(limit + 1)
+    return_list = [todo_item(todo_data) async for todo_data in cursor]
+
+    next_cursor = None
+    if len(return_list) > limit:
+        return_list = return_list[:limit]
+        last = return_list[-1]
+        next_cursor = make_name_cursor(last["name"], last["id"]) if by_name else last["id"]
+    return ORJSONResponse({"todos": return_list, "next_cursor": next_cursor}, headers=headers)
+
+
+@todo_router.get("/summary", status_code=status.HTTP_200_OK)
+async def get_todo_summary(
+    request: Request,
+    response: Response,
+    q: str | None = Query(default=None, max_length=TODO_SEARCH_MAX_LENGTH),
+    if_none_match: str | None = Header(default=None),
+    current_user: User = Depends(get_user_from_token),
+) -> TodoSummary:
+    """
+    Total / completed / open counts of the current user's todos (optionally only those
+    matching `q`), from one aggregation instead of pulling the whole list. Without `q`
+    it is answered from the `owner_id_task_complete_id` index alone. Supports conditional GETs.
+    """
+    version = await get_todo_version(current_user.user_id)
+    etag = make_etag(current_user.user_id, version, f"summary:{request.url.query}")
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(etag, if_none_match):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+    pipeline = [
+        {"$match": build_todo_query(current_user.user_id, None, q)},
+        {"$group": {
+            "_id": None,
+            "total": {"$sum": 1},
+            "completed": {"$sum": {"$cond": ["$task_complete", 1, 0]}},
+        }},
+    ]
+    results = await content_collection.aggregate(pipeline).to_list(length=1)
+    counts = results[0] if results else {"total": 0, "completed": 0}
+    return TodoSummary(
+        total=counts["total"],
+        completed=counts["completed"],
+        open=counts["total"] - counts["completed"],
+    )
 
 
 @todo_router.post("/", status_code=status.HTTP_201_CREATED)
-def create_todo(todo: Todo, current_user: User = Depends(get_confirmed_user)):
-    # Notice: NO ASYNC because writing to dB
+async def create_todo(todo: Todo, current_user: User = Depends(get_user_from_token)):
     # Insert the new Item into the `content_collection`
     todo.owner_id = current_user.user_id
-    content_collection.insert_one(todo.model_dump())
+    result = await content_collection.insert_one(todo.model_dump())
+    await record_todo_change(current_user.user_id, "insert", [str(result.inserted_id)])
 
 
 @todo_router.put("/{id}", status_code=status.HTTP_200_OK)
-def update_todo(id: str, todo: Todo, current_user: User = Depends(get_confirmed_user)):
-    # Notice: NO ASYNC because writing to dB
+async def update_todo(id: str, todo: Todo, current_user: User = Depends(get_user_from_token)):
     todo.owner_id = current_user.user_id
-    content_collection.find_one_and_update(
-        {"_id": ObjectId(id)}, {"$set": todo.model_dump()})
+    if await content_collection.find_one_and_update(
+            {"_id": ObjectId(id), "owner_id": current_user.user_id}, {"$set": todo.model_dump()}):
+        await record_todo_change(current_user.user_id, "update", [id])
 
 
 @todo_router.delete("/{id}", status_code=status.HTTP_200_OK)
-def delete_todo(id: str, current_user: User = Depends(get_confirmed_user)):
-    # Notice: NO ASYNC because writing to dB
-    content_collection.find_one_and_delete({"_id": ObjectId(id)})
+async def delete_todo(id: str, current_user: User = Depends(get_user_from_token)):
+    if await content_collection.find_one_and_delete(
+            {"_id": ObjectId(id), "owner_id": current_user.user_id}):
+        await record_todo_change(current_user.user_id, "delete", [id])
+
+
+# ------------------------------------------------------------------------
+# BATCH SECTION (one request, one `bulk_write`)
+# ------------------------------------------------------------------------
+
+async def run_batch(owner_id: str, change: str, items: list, build_op, ordered: bool) -> TodoBatchResult:
+    """
+    Turn every item into a write with `build_op(item) -> (id, op)` and run them all as one
+    `bulk_write`. Items that can't be turned into a write (bad ids, or, for updates and deletes,
+    ids that aren't the owner's todos) fail on their own; in an ordered batch they, like a
+    failing write, stop everything after them.
+    The written ids are then recorded as one `change` ("insert", "update" or "delete").
+    """
+    results = [TodoBatchItemResult(index=i, ok=False) for i in range(len(items))]
+    built = []  # (item index, op)
+    for index, item in enumerate(items):
+        try:
+            results[index].id, op = build_op(item)
+        except (InvalidId, TypeError):
+            results[index].error = "Invalid id."
+            if ordered:
+                break
+            continue
+        built.append((index, op))
+
+    existing = None
+    if change != "insert" and built:
+        # A filter that matches nothing is no error to `bulk_write`, so look the ids up first
+        # (one round-trip) rather than report, and publish, writes that never happened
+        cursor = content_collection.find(
+            {"_id": {"$in": [ObjectId(results[index].id) for index, _ in built]}, "owner_id": owner_id},
+            projection={"_id": 1})
+        existing = {str(todo_data["_id"]) async for todo_data in cursor}
+    ops = []
+    op_items = []  # op index -> item index
+    for index, op in built:
+        if existing is not None:
+            if results[index].id not in existing:
+                results[index].error = "Not found."
+                if ordered:
+                    break
+                continue
+            if change == "delete":
+                # The same id twice: only the first delete finds it
+                existing.discard(results[index].id)
+        ops.append(op)
+        op_items.append(index)
+
+    details = {}
+    write_errors = {}
+    if ops:
+        try:
+            details = (await content_collection.bulk_write(ops, ordered=ordered)).bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            write_errors = {err["index"]: err.get("errmsg", "Write failed.")
+                            for err in details.get("writeErrors", [])}
+
+    first_error = min(write_errors, default=None)
+    for op_index, index in enumerate(op_items):
+        if op_index in write_errors:
+            results[index].error = write_errors[op_index]
+        elif ordered and first_error is not None and op_index > first_error:
+            results[index].error = "Not executed: an earlier item in this ordered batch failed."
+        else:
+            results[index].ok = True
+    for result in results:
+        if not result.ok and result.error is None:
+            result.error = "Not executed: an earlier item in this ordered batch failed."
+    written = [result.id for result in results if result.ok]
+    if written:
+        # Even a failed batch may have written some items
+        await record_todo_change(owner_id, change, written)
+
+    return TodoBatchResult(
+        results=results,
+        inserted=details.get("nInserted", 0),
+        matched=details.get("nMatched", 0),
+        modified=details.get("nModified", 0),
+        deleted=details.get("nRemoved", 0),
+    )
+
+
+@todo_router.post("/batch/create", status_code=status.HTTP_200_OK)
+async def create_todos(batch: TodoBatchCreate, current_user: User = Depends(get_user_from_token)) -> TodoBatchResult:
+    """
+    Create many todos in one request (and one DB round-trip).
+    """
+    def build_op(todo: Todo):
+        todo.owner_id = current_user.user_id
+        document = todo.model_dump()
+        document["_id"] = ObjectId()
+        return str(document["_id"]), InsertOne(document)
+    return await run_batch(current_user.user_id, "insert", batch.todos, build_op, batch.ordered)
+
+
+@todo_router.post("/batch/update", status_code=status.HTTP_200_OK)
+async def update_todos(batch: TodoBatchUpdate, current_user: User = Depends(get_user_from_token)) -> TodoBatchResult:
+    """
+    Update many of the current user's todos in one request. `matched` tells how many
+    of the ids actually belonged to the user.
+    """
+    def build_op(todo: TodoItem):
+        fields = todo.model_dump(exclude={"id"})
+        return todo.id, UpdateOne(
+            {"_id": ObjectId(todo.id), "owner_id": current_user.user_id}, {"$set": fields})
+    return await run_batch(current_user.user_id, "update", batch.todos, build_op, batch.ordered)
+
+
+@todo_router.post("/batch/delete", status_code=status.HTTP_200_OK)
+async def delete_todos(batch: TodoBatchIds, current_user: User = Depends(get_user_from_token)) -> TodoBatchResult:
+    """
+    Delete many of the current user's todos in one request.
+    """
+    def build_op(id: str):
+        return id, DeleteOne({"_id": ObjectId(id), "owner_id": current_user.user_id})
+    return await run_batch(current_user.user_id, "delete", batch.ids, build_op, batch.ordered)
+
+
+@todo_router.post("/batch/toggle-complete", status_code=status.HTTP_200_OK)
+async def toggle_todos(batch: TodoBatchIds, current_user: User = Depends(get_user_from_token)) -> TodoBatchResult:
+    """
+    Flip `task_complete` on many of the current user's todos in one request
+    (done server-side with an update pipeline, so no read is needed first).
+    """
+    def build_op(id: str):
+        return id, UpdateOne(
+            {"_id": ObjectId(id), "owner_id": current_user.user_id},
+            [{"$set": {"task_complete": {"$not": ["$task_complete"]}}}],
+        )
+    return await run_batch(current_user.user_id, "update", batch.ids, build_op, batch.ordered)
+
+
+# ------------------------------------------------------------------------
+# LIVE UPDATES SECTION (Server-Sent Events, instead of polling the list)
+# ------------------------------------------------------------------------
+
+async def stream_todo_events(request: Request, token_data: dict, last_event_id: str | None):
+    heartbeat = get_settings().todo_events_heartbeat_seconds
+    expires_at = token_data["exp"]
+    # Subscribe before reading the version, so no change can slip in between
+    queue = todo_event_broker.subscribe(token_data["id"])
+
+    async def gone() -> bool:
+        return (await request.is_disconnected()
+                or await session_revocations.is_revoked(token_data["sid"]))
+
+    try:
+        # EventSource reconnects on its own after this many ms, sending `Last-Event-ID`
+        yield "retry: 3000\n\n"
+        if last_event_id is not None and last_event_id != await get_todo_version(token_data["id"]):
+            yield format_sse(RESYNC_EVENT)
+        last_check = time.monotonic()
+        while True:
+            timeout = heartbeat
+            if expires_at is not None:
+                # The token was only checked when the stream opened; it must not outlive it
+                timeout = min(heartbeat, expires_at - time.time())
+                if timeout <= 0:
+                    yield format_sse(EXPIRED_EVENT)
+                    return
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                if expires_at is not None and time.time() >= expires_at:
+                    continue
+                # Quiet for a while: keep proxies from closing the connection, and make
+                # sure neither the client nor its session has gone away
+                if await gone():
+                    return
+                last_check = time.monotonic()
+                yield ": ping\n\n"
+                continue
+            # A busy stream never goes quiet, so check as often here too (a logged out session
+            # must stop getting pushes, and a dead client must give its queue back)
+            if time.monotonic() - last_check >= heartbeat:
+                if await gone():
+                    return
+                last_check = time.monotonic()
+            yield format_sse(event)
+    finally:
+        todo_event_broker.unsubscribe(token_data["id"], queue)
+
+
+@todo_router.get("/events")
+async def get_todo_events(
+    request: Request,
+    last_event_id: str | None = Header(default=None),
+    token_data: dict = Depends(get_token_data),
+) -> StreamingResponse:
+    """
+    Streams changes to the current user's todo list as Server-Sent Events (authenticated by
+    the `access_token` cookie, so `new EventSource("/api/v1/todo/events")` just works).
+    Each `todos` event carries the new list version (also its event id) and, when known, the
+    operation and the changed todo ids; `resync` means "refetch the list". A reconnecting
+    client that missed a change (its `Last-Event-ID` is not the current version) gets a `resync`.
+    The stream ends when the access token expires (after an `expired` event) or its session is revoked.
+    """
+    return StreamingResponse(
+        stream_todo_events(request, token_data, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,29 +1,26 @@
 from typing import Annotated
-from bson import ObjectId
-from datetime import timedelta
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timedelta
+from time import perf_counter
 
 from fastapi import APIRouter, Response, Request, Depends, HTTPException, status
 from starlette.responses import RedirectResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.templating import Jinja2Templates
 
 from pydantic import BaseModel
 
 from backend.config.constants import (
-    FRONTEND_PAGE_TEMPLATES,
     FRONTEND_APP_PAGES,
     FRONTEND_AUTH_PAGES,
     FRONTEND_USER_PAGES
 )
 
 from backend.config.db import users_collection
-from backend.models.user_model import User, UserProfile
+from backend.models.user_model import SessionInfo, User, UserPublic
 
 from backend.auth import (
-    ACCESS_TOKEN_EXPIRE_MINUTES,
-    REFRESH_TOKEN_EXPIRE_DAYS,
-    GITHUB_CLIENT_ID,
-    GITHUB_SECRET_KEY,
+    AUTH_USER_PROJECTION,
+    REFRESH_TOKEN_TYPE,
     Token,
     get_confirmed_user,
     create_access_token,
@@ -34,23 +31,30 @@ from backend.auth import (
 from backend.auth import (
     get_password_hash,
     get_user_from_db,
+    get_token_data,
     get_user_from_token
 )
 
-
-import httpx
-from dotenv import load_dotenv
-
 from backend.config.db import users_collection
+from backend.config.settings import get_settings
+from backend.http_client import http_client
+from backend.rate_limit import get_client_ip, limit_login, limit_register
+from backend.sessions import (
+    create_session,
+    list_sessions,
+    revoke_session,
+    revoke_user_sessions,
+    session_revocations,
+)
+from backend.templating import templates
+from backend.user_cache import invalidate_user
+from backend.metrics import OAUTH_UPSTREAM_DURATION
 from backend.log import get_logger
 
 
 # Get our good 'ol Logger
 logger = get_logger(__name__)
 
-# Load environment variables from the .env file
-load_dotenv()
-
 
 user_router = APIRouter(
     # prefix=f"{API_PREFIX}/user",
@@ -58,12 +62,10 @@ user_router = APIRouter(
     tags=["User-related stuff"],
 )
 
-templates = Jinja2Templates(directory=FRONTEND_PAGE_TEMPLATES)
 
-
-# Github OAuth variables:
-github_auth_url = f"https://github.com/login/oauth/authorize?client_id={GITHUB_CLIENT_ID}"
-github_token_url = "https://github.com/login/oauth/access_token"
+def get_github_auth_url() -> str:
+    settings = get_settings()
+    return f"{settings.github_authorize_url}?client_id={settings.github_client_id}"
 
 
 class CreateUserRequest(BaseModel):
@@ -82,11 +84,11 @@ async def get_index(request: Request):
 
 
 @user_router.get("/profile")
-async def get_user_profile(request: Request, current_user: User = Depends(get_user_from_token)) -> User:
+async def get_user_profile(request: Request, current_user: User = Depends(get_user_from_token)) -> UserPublic:
     """
-    Returns a `User` object representing the current_user.
+    Returns the current_user's public fields.
     """
-    return current_user
+    return UserPublic(email=current_user.email, user_id=current_user.user_id)
 
 
 @user_router.get("/register")
@@ -105,6 +107,7 @@ async def github_login():
     x
     """
     # might also use: status.HTTP_307_TEMPORARY_REDIRECT
+    github_auth_url = get_github_auth_url()
     logger.info(f"GITHUB OAUTH REDIRECT: {github_auth_url}")
     return RedirectResponse(github_auth_url, status_code=status.HTTP_302_FOUND)
 
@@ -115,14 +118,17 @@ async def github_code(code: str):
     x
     """
     logger.info(f"GITHUB YIELDED CODE: {code}")
+    settings = get_settings()
     params = {
-        "client_id": GITHUB_CLIENT_ID,
-        "client_secret": GITHUB_SECRET_KEY,
+        "client_id": settings.github_client_id,
+        "client_secret": settings.github_secret_key,
         "code": code,
     }
     headers = {"Accept": "application/json"}
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url=github_token_url, params=params, headers=headers)
+    time_start = perf_counter()
+    response = await http_client.post(url=settings.github_token_url, params=params, headers=headers)
+    OAUTH_UPSTREAM_DURATION.labels("github", "token", str(response.status_code)).observe(
+        perf_counter() - time_start)
     response = response.json()
     logger.info(f"RESPONSE FROM GITHUB TOKEN URL: {response}")
     access_token = response["access_token"]
@@ -130,9 +136,11 @@ async def github_code(code: str):
         "access_token": access_token,
         "token_type": "Bearer",
     }
-    async with httpx.AsyncClient() as client:
-        headers.update({"Authorization": f"Bearer {access_token}"})
-        response = await client.get(url="https://api.github.com/user", headers=headers)
+    headers.update({"Authorization": f"Bearer {access_token}"})
+    time_start = perf_counter()
+    response = await http_client.get(url=f"{settings.github_api_url}/user", headers=headers)
+    OAUTH_UPSTREAM_DURATION.labels("github", "user", str(response.status_code)).observe(
+        perf_counter() - time_start)
     response = response.json()
     user_data = {}
     if not response["email"]:
@@ -148,11 +156,12 @@ async def github_code(code: str):
 # ------------------------------------------------------------------------
 
 @user_router.post("/register", status_code=status.HTTP_201_CREATED)
-def create_user(create_user_request: CreateUserRequest):
+async def create_user(request: Request, create_user_request: CreateUserRequest):
     """
     Create a new user in the dB.
     """
-    if get_user_from_db(create_user_request.email):
+    await limit_register(request, create_user_request.email)
+    if await get_user_from_db(create_user_request.email, projection=AUTH_USER_PROJECTION):
         # Email is already registered
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -161,20 +170,31 @@ def create_user(create_user_request: CreateUserRequest):
     else:
         create_user_model = User(
             email=create_user_request.email,
-            password=get_password_hash(create_user_request.password),
+            password=await get_password_hash(create_user_request.password),
         )
-        users_collection.insert_one(create_user_model.model_dump())
+        try:
+            result = await users_collection.insert_one(
+                create_user_model.model_dump(exclude={"user_id"}))
+        except DuplicateKeyError:
+            # Lost a race with a concurrent registration for the same email
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=f"Email address already registered: {create_user_request.email}",
+            )
+        await invalidate_user(str(result.inserted_id))
 
 
 @user_router.post("/login")
 async def login_for_access_token(response: Response, request: Request, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]) -> Token:
     """
     This is the login route for tokens (email/password login).
-    It retrieves an `authenticated_user()` with the form's username and password,
-    gets the associated user ID from the db and patches it in to the object,
-    generates access & refresh tokens, adds the refresh token to the db and returns the access token.
+    It retrieves a confirmed user (with its ID and password hash, in one query) for the form's
+    username and password, opens a new session for this device (the only write), and returns
+    access & refresh tokens tied to that session.
+    Budget: 1 read + 1 write per successful login (see `bench/check_login_budget.py`).
     """
-    user = get_confirmed_user(form_data.username, form_data.password)
+    await limit_login(request, form_data.username)
+    user = await get_confirmed_user(form_data.username, form_data.password)
 
     if not user:
         error = "Could not validate connection."
@@ -182,25 +202,29 @@ async def login_for_access_token(response: Response, request: Request, form_data
         # return templates.TemplateResponse('auth/signin.html', {"error": error, "request": request}, status_code=301)
         return templates.TemplateResponse(f"{FRONTEND_AUTH_PAGES}/login.html", {"error": error, "request": request}, status_code=status.HTTP_401_UNAUTHORIZED)
 
-    user_id = users_collection.find_one({"email": user.email})["_id"]
+    user_id = user.user_id
+    refresh_expires_delta = timedelta(
+        days=get_settings().backend_refresh_token_expire_days)
+    # The session lives exactly as long as its refresh token (then the TTL index removes it)
+    session_id = await create_session(
+        user_id=str(user_id),
+        expires_at=datetime.utcnow() + refresh_expires_delta,
+        user_agent=request.headers.get("user-agent"),
+        ip=get_client_ip(request),
+    )
     access_token = create_access_token(
         email=user.email,
         id=str(user_id),
-        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expires_delta=timedelta(minutes=get_settings().backend_access_token_expire_minutes),
+        session_id=session_id,
     )
     refresh_token = create_access_token(
         email=user.email,
         id=str(user_id),
-        expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+        expires_delta=refresh_expires_delta,
+        session_id=session_id,
+        token_type=REFRESH_TOKEN_TYPE,
     )
-    # session_id = uuid.uuid4()
-
-    # # Add the `session_id` to the List of active_sessions
-    # users_collection.find_one_and_update(
-    #     {"_id": ObjectId(user_id)}, {"$push": {"active_sessions": str(session_id)}})
-
-    users_collection.find_one_and_update(
-        {"_id": ObjectId(user_id)}, {"$set": {"refresh_token": refresh_token}})
 
     response = RedirectResponse(
         url="/", status_code=status.HTTP_302_FOUND)
@@ -231,16 +255,19 @@ async def login_for_access_token(response: Response, request: Request, form_data
 # async def renew_access_tokens(refresh_token: Annotated[str, Depends(oauth2_bearer)]):
 async def renew_access_tokens(refresh_token: str):
     """
-    If the `refresh_token` is still valid, gen a new access token for our user.
-    Else, error out.
+    If the `refresh_token` is still valid (and its session hasn't been revoked),
+    gen a new access token for our user. Else, error out.
     """
     token_data = verify_access_token(refresh_token)
-    if token_data:
+    if (token_data and token_data["type"] == REFRESH_TOKEN_TYPE
+            and token_data["sid"] is not None
+            and not await session_revocations.is_revoked(token_data["sid"])):
         # Refresh token is valid and we need to return a new access token.
         access_token = create_access_token(
             email=token_data["username"],
             id=str(token_data["id"]),
-            expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+            expires_delta=timedelta(minutes=get_settings().backend_access_token_expire_minutes),
+            session_id=token_data["sid"],
         )
         print(
             f"[yellow]\[{token_data['username']}] Token Refresh: requested and granted![/yellow]")
@@ -257,3 +284,56 @@ async def renew_access_tokens(refresh_token: str):
         logger.info(
             "Attempted request for token refresh, but Refresh Token is INVALID!")
         raise credential_exception
+
+
+@user_router.post("/logout")
+async def logout(token_data: dict = Depends(get_token_data)):
+    """
+    Revoke the current session (so its refresh token stops working everywhere) and clear the cookies.
+    """
+    if token_data["sid"] is not None:
+        await revoke_session(token_data["sid"], user_id=token_data["id"])
+    logger.info(f"[{token_data['username']}] Logged out.")
+    response = RedirectResponse(url="/", status_code=status.HTTP_302_FOUND)
+    response.delete_cookie(key="access_token")
+    response.delete_cookie(key="refresh_token")
+    return response
+
+
+@user_router.get("/sessions")
+async def get_sessions(token_data: dict = Depends(get_token_data)) -> list[SessionInfo]:
+    """
+    List the user's logged-in devices, marking the one making this request.
+    """
+    sessions = await list_sessions(token_data["id"])
+    return [
+        SessionInfo(
+            id=session["_id"],
+            created_at=session["created_at"],
+            expires_at=session["expires_at"],
+            user_agent=session.get("user_agent"),
+            ip=session.get("ip"),
+            current=session["_id"] == token_data["sid"],
+        )
+        for session in sessions
+    ]
+
+
+@user_router.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_session(session_id: str, token_data: dict = Depends(get_token_data)):
+    """
+    Log one of the user's devices out.
+    """
+    if not await revoke_session(session_id, user_id=token_data["id"]):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
+
+
+@user_router.post("/sessions/revoke-others")
+async def revoke_other_sessions(token_data: dict = Depends(get_token_data)):
+    """
+    Log out everywhere except this device.
+    """
+    revoked = await revoke_user_sessions(token_data["id"], keep_session_id=token_data["sid"])
+    logger.info(f"[{token_data['username']}] Revoked {revoked} other sessions.")
+    return {"revoked": revoked}
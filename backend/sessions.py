@@ -0,0 +1,246 @@
+import math
+import asyncio
+import hashlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import DESCENDING
+from pymongo.errors import PyMongoError
+
+from backend.config.db import sessions_collection
+from backend.config.settings import get_settings
+from backend.metrics import REGISTRY
+
+from backend.log import get_logger
+logger = get_logger(__name__)
+
+# Re-read a little behind the newest revocation we've seen, to catch writes that were in flight
+REVOCATION_POLL_OVERLAP = timedelta(seconds=5)
+
+
+# ------------------------------------------------------------------------
+# Session store: one document per login (i.e. per device), expired by a TTL index
+# {"_id": <session id>, "user_id", "created_at", "expires_at", "user_agent", "ip", "revoked_at"?}
+# ------------------------------------------------------------------------
+
+async def create_session(user_id: str, expires_at: datetime, user_agent: str | None, ip: str | None) -> str:
+    session_id = str(ObjectId())
+    await sessions_collection.insert_one({
+        "_id": session_id,
+        "user_id": user_id,
+        "created_at": datetime.utcnow(),
+        "expires_at": expires_at,
+        "user_agent": user_agent,
+        "ip": ip,
+    })
+    return session_id
+
+
+async def list_sessions(user_id: str) -> list[dict]:
+    """
+    The user's live sessions (one per logged-in device), newest first.
+    """
+    cursor = sessions_collection.find(
+        {"user_id": user_id, "revoked_at": {"$exists": False},
+         "expires_at": {"$gt": datetime.utcnow()}},
+    ).sort("created_at", DESCENDING)
+    return [session async for session in cursor]
+
+
+async def revoke_session(session_id: str, user_id: str | None = None) -> bool:
+    """
+    Revoke one session (scoped to `user_id` when given). Returns False if there was nothing to revoke.
+    The revocation time comes from the server clock, so every worker can poll for it in order.
+    """
+    query = {"_id": session_id, "revoked_at": {"$exists": False}}
+    if user_id is not None:
+        query["user_id"] = user_id
+    result = await sessions_collection.update_one(
+        query, {"$currentDate": {"revoked_at": True}})
+    if result.modified_count == 0:
+        return False
+    session_revocations.add(session_id)
+    return True
+
+
+async def revoke_user_sessions(user_id: str, keep_session_id: str | None = None) -> int:
+    """
+    Revoke every live session of a user ("log out everywhere"), optionally except `keep_session_id`.
+    """
+    query = {"user_id": user_id, "revoked_at": {"$exists": False}}
+    if keep_session_id is not None:
+        query["_id"] = {"$ne": keep_session_id}
+    session_ids = await sessions_collection.distinct("_id", query)
+    if not session_ids:
+        return 0
+    result = await sessions_collection.update_many(
+        {"_id": {"$in": session_ids}, "revoked_at": {"$exists": False}},
+        {"$currentDate": {"revoked_at": True}})
+    for session_id in session_ids:
+        session_revocations.add(session_id)
+    return result.modified_count
+
+
+# ------------------------------------------------------------------------
+# Per-worker revocation set
+# ------------------------------------------------------------------------
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings: no false negatives, `error_rate` false positives
+    at `capacity` items. Bit positions come from one blake2b digest (double hashing).
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(item))
+
+
+class RevocationSet:
+    """
+    Answers "is this session revoked?" on every request without a DB round-trip.
+    All revoked, unexpired sessions go into a Bloom filter (rebuilt from the db every
+    `rebuild_seconds`); revocations since the last rebuild are also kept in an exact
+    `recent` map, refreshed incrementally every `refresh_seconds`. A session that isn't in
+    the filter is definitely live. A filter hit that isn't in `recent` (an older revocation,
+    or a false positive) is settled by the db once and remembered.
+    """
+
+    def __init__(self, refresh_seconds: float, rebuild_seconds: float, capacity: int, error_rate: float, max_checked: int = 10_000):
+        self.refresh_seconds = refresh_seconds
+        self.rebuild_seconds = rebuild_seconds
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.max_checked = max_checked
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.recent: dict[str, datetime | None] = {}
+        # session id -> revoked? for filter hits we had to settle with the db
+        self.checked: OrderedDict[str, bool] = OrderedDict()
+        self.last_seen: datetime | None = None
+        self.db_checks = 0
+        self._task: asyncio.Task | None = None
+
+    def add(self, session_id: str, revoked_at: datetime | None = None) -> None:
+        if session_id not in self.recent:
+            self.bloom.add(session_id)
+        self.recent[session_id] = revoked_at
+        self.checked.pop(session_id, None)
+
+    async def is_revoked(self, session_id: str | None) -> bool:
+        if session_id is None or session_id not in self.bloom:
+            return False
+        if session_id in self.recent:
+            return True
+        revoked = self.checked.get(session_id)
+        if revoked is None:
+            self.db_checks += 1
+            session = await sessions_collection.find_one(
+                {"_id": session_id}, projection={"revoked_at": 1})
+            revoked = session is not None and "revoked_at" in session
+            self.checked[session_id] = revoked
+            while len(self.checked) > self.max_checked:
+                self.checked.popitem(last=False)
+        return revoked
+
+    async def rebuild(self) -> None:
+        """
+        Rebuild the filter from every revoked session that hasn't expired yet.
+        """
+        query = {"revoked_at": {"$exists": True},
+                 "expires_at": {"$gt": datetime.utcnow()}}
+        total = await sessions_collection.count_documents(query)
+        bloom = BloomFilter(max(self.capacity, total * 2), self.error_rate)
+        last_seen = self.last_seen
+        async for session in sessions_collection.find(query, projection={"revoked_at": 1}):
+            bloom.add(session["_id"])
+            if last_seen is None or session["revoked_at"] > last_seen:
+                last_seen = session["revoked_at"]
+        # Anything revoked while we were reading is still in `recent`; keep it
+        for session_id in self.recent:
+            bloom.add(session_id)
+        self.bloom = bloom
+        self.recent = {}
+        self.checked.clear()
+        self.last_seen = last_seen
+        logger.info(f"Revocation filter rebuilt with {total} revoked sessions.")
+
+    async def refresh(self) -> None:
+        """
+        Pull in the revocations made (by any worker) since the last one we saw.
+        """
+        query = {"revoked_at": {"$exists": True}}
+        if self.last_seen is not None:
+            query["revoked_at"] = {"$gt": self.last_seen - REVOCATION_POLL_OVERLAP}
+        async for session in sessions_collection.find(query, projection={"revoked_at": 1}):
+            self.add(session["_id"], session["revoked_at"])
+            if self.last_seen is None or session["revoked_at"] > self.last_seen:
+                self.last_seen = session["revoked_at"]
+
+    async def start(self) -> None:
+        await self.rebuild()
+        self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _poll(self) -> None:
+        loop = asyncio.get_running_loop()
+        last_rebuild = loop.time()
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                if loop.time() - last_rebuild >= self.rebuild_seconds:
+                    await self.rebuild()
+                    last_rebuild = loop.time()
+                else:
+                    await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                logger.warning(f"Revocation filter refresh error: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "filtered": self.bloom.count,
+            "recent": len(self.recent),
+            "db_checks": self.db_checks,
+        }
+
+
+session_revocations = RevocationSet(
+    refresh_seconds=get_settings().session_revocation_refresh_seconds,
+    rebuild_seconds=get_settings().session_revocation_rebuild_seconds,
+    capacity=get_settings().session_revocation_bloom_capacity,
+    error_rate=get_settings().session_revocation_bloom_error_rate,
+)
+
+REGISTRY.register_collector(lambda: [
+    ("session_revocations_filtered", "gauge", "Revoked sessions in this worker's Bloom filter.",
+     [({}, session_revocations.bloom.count)]),
+    ("session_revocations_recent", "gauge", "Revocations since the last filter rebuild (exact).",
+     [({}, len(session_revocations.recent))]),
+    ("session_revocation_db_checks_total", "counter", "Filter hits that had to be settled by the db.",
+     [({}, session_revocations.db_checks)]),
+])
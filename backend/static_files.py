@@ -0,0 +1,124 @@
+import os
+import json
+import stat
+import mimetypes
+from functools import lru_cache
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from backend.config.constants import (
+    FRONTEND_STATIC_BUILD,
+    STATIC_MANIFEST,
+    STATIC_URL_PREFIX,
+)
+
+from backend.log import get_logger
+logger = get_logger(__name__)
+
+# Hashed asset names never change content, so browsers may keep them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+# Preferred first
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def load_manifest(build_directory: str = FRONTEND_STATIC_BUILD) -> dict:
+    """
+    Read the manifest written by `build_static.py` (empty if the assets were never built).
+    """
+    try:
+        with open(os.path.join(build_directory, STATIC_MANIFEST)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {"assets": {}, "encodings": {}}
+    logger.info(
+        f"Loaded static manifest with {len(manifest['assets'])} assets.")
+    return manifest
+
+
+@lru_cache
+def get_static_manifest() -> dict:
+    """
+    The build manifest, read on first use (normally the startup template warm-up).
+    """
+    return load_manifest()
+
+
+def static_url(path: str) -> str:
+    """
+    Template helper: the URL for a static asset, using its fingerprinted name when built.
+    """
+    path = path.lstrip("/")
+    return f"{STATIC_URL_PREFIX}/{get_static_manifest()['assets'].get(path, path)}"
+
+
+def accepted_encodings(scope: Scope) -> set[str]:
+    accepted = set()
+    for part in Headers(scope=scope).get("accept-encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    `StaticFiles` that also serves the build output of `build_static.py`:
+    fingerprinted assets get `Cache-Control: immutable`, and when the client accepts it,
+    the prebuilt `.br`/`.gz` sibling is sent instead of compressing anything per request.
+    Unbuilt files are still served from `directory`, with revalidation.
+    """
+
+    def __init__(self, *args, build_directory: str = FRONTEND_STATIC_BUILD, manifest: dict | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._manifest = manifest
+        self._hashed_paths: set[str] | None = None
+        if os.path.isdir(build_directory):
+            self.all_directories = [build_directory, *self.all_directories]
+
+    @property
+    def manifest(self) -> dict:
+        if self._manifest is None:
+            self._manifest = get_static_manifest()
+        return self._manifest
+
+    @property
+    def hashed_paths(self) -> set[str]:
+        if self._hashed_paths is None:
+            self._hashed_paths = set(self.manifest["assets"].values())
+        return self._hashed_paths
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        path = path.replace(os.sep, "/")
+        available = self.manifest["encodings"].get(path, ())
+        accepted = accepted_encodings(scope) if available else set()
+        encoding = next((e for e in ENCODING_SUFFIXES
+                         if e in available and e in accepted), None)
+
+        stat_result = None
+        if encoding is not None and scope["method"] in ("GET", "HEAD"):
+            full_path, stat_result = await run_in_threadpool(
+                self.lookup_path, path + ENCODING_SUFFIXES[encoding])
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            # No variant wanted, or it's in the manifest but not on disk (e.g. a partial build):
+            # the uncompressed file, labelled as such
+            response = await super().get_response(path, scope)
+        else:
+            response = self.file_response(full_path, stat_result, scope)
+            media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            if media_type.startswith("text/"):
+                media_type += "; charset=utf-8"
+            response.headers["content-type"] = media_type
+            response.headers["content-encoding"] = encoding
+
+        if available:
+            response.headers["vary"] = "Accept-Encoding"
+        if response.status_code in (200, 304):
+            response.headers["cache-control"] = (
+                IMMUTABLE_CACHE_CONTROL if path in self.hashed_paths else REVALIDATE_CACHE_CONTROL)
+        return response
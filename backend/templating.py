@@ -0,0 +1,53 @@
+import os
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from jinja2.bccache import Bucket
+
+from backend.config.constants import FRONTEND_PAGE_TEMPLATES
+from backend.config.settings import get_settings
+from backend.static_files import static_url
+
+from backend.log import get_logger
+logger = get_logger(__name__)
+
+
+class LazyBytecodeCache(FileSystemBytecodeCache):
+    """
+    `FileSystemBytecodeCache` that creates its directory when it first writes, not at import.
+    """
+
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        super().dump_bytecode(bucket)
+
+
+def build_template_env() -> Environment:
+    """
+    The one Jinja2 environment every router renders with. Compiled templates are shared
+    in memory and persisted to a bytecode cache, so a fresh worker doesn't re-compile them.
+    In production, templates are never re-checked against the filesystem.
+    """
+    settings = get_settings()
+    return Environment(
+        loader=FileSystemLoader(FRONTEND_PAGE_TEMPLATES),
+        autoescape=True,
+        bytecode_cache=LazyBytecodeCache(settings.templates_bytecode_cache_dir),
+        auto_reload=not settings.is_production,
+    )
+
+
+template_env = build_template_env()
+template_env.globals["static_url"] = static_url
+templates = Jinja2Templates(env=template_env)
+
+
+def precompile_templates() -> int:
+    """
+    Load (and so compile and cache) every page template now, so the first request
+    after a deploy is as fast as every later one. Returns how many were compiled.
+    """
+    names = template_env.list_templates(extensions=["html"])
+    for name in names:
+        template_env.get_template(name)
+    return len(names)
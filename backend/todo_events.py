@@ -0,0 +1,216 @@
+import json
+import asyncio
+
+from pymongo.errors import PyMongoError
+
+from backend.config.settings import get_settings
+from backend.metrics import REGISTRY
+from backend.todo_versions import MAX_CHANGED_IDS, bump_todo_version, versions_collection
+
+from backend.log import get_logger
+logger = get_logger(__name__)
+
+# Sent when a subscriber may have missed changes: refetch the list rather than patch it
+RESYNC_EVENT = {"event": "resync"}
+# Sent right before a stream closes because its access token ran out: refresh it, then reconnect
+EXPIRED_EVENT = {"event": "expired"}
+
+# Version documents are upserted, so a change is an insert (first write) or an update
+CHANGE_PIPELINE = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+
+
+def make_event(version: str, op: str | None, ids: list[str] | None) -> dict:
+    return {"event": "todos", "id": version, "data": {"version": version, "op": op, "ids": ids}}
+
+
+def format_sse(event: dict) -> str:
+    lines = [f"event: {event['event']}"]
+    if "id" in event:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"data: {json.dumps(event.get('data', {}), separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class TodoEventBroker:
+    """
+    In-process pub/sub of todo list changes, keyed by owner id. Every open live-update stream
+    on this worker holds one bounded queue; a subscriber that falls behind has its backlog
+    replaced by a single `resync` event instead of growing without bound.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.published = 0
+        self.resyncs = 0
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+
+    def subscribe(self, owner_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(owner_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, owner_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(owner_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[owner_id]
+
+    def publish(self, owner_id: str, event: dict) -> None:
+        for queue in self._subscribers.get(owner_id, ()):
+            self._put(queue, event)
+
+    def publish_all(self, event: dict) -> None:
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._put(queue, event)
+
+    def _put(self, queue: asyncio.Queue, event: dict) -> None:
+        try:
+            queue.put_nowait(event)
+            self.published += 1
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC_EVENT)
+            self.resyncs += 1
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+
+class ChangeStreamWatcher:
+    """
+    Feeds the broker from a change stream on the todo versions collection, so a change made by
+    any worker reaches the subscribers on this one. Every todo writer bumps its owner's version
+    document (whose `_id` is the owner id), so one stream per worker covers inserts, updates,
+    deletes and batches alike, and is routed to subscribers by owner id in process, rather than
+    holding a server-side cursor per open connection.
+    Change streams need a replica set; a single-node one will do
+    (`mongod --replSet rs0`, then `rs.initiate()` once in `mongosh`).
+    """
+
+    def __init__(self, broker: TodoEventBroker):
+        self.broker = broker
+        self.live = False
+        self._resume_token = None
+        self._task: asyncio.Task | None = None
+
+    async def _open(self):
+        stream = versions_collection.watch(
+            CHANGE_PIPELINE,
+            full_document="updateLookup",
+            resume_after=self._resume_token,
+            max_await_time_ms=1000,
+        )
+        try:
+            # The stream is only opened on the server by the first fetch
+            change = await stream.try_next()
+        except PyMongoError:
+            await stream.close()
+            raise
+        self.live = True
+        if change is not None:
+            self._dispatch(change)
+        self._resume_token = stream.resume_token
+        return stream
+
+    def _dispatch(self, change: dict) -> None:
+        version = change.get("fullDocument")
+        if not version or "v" not in version:
+            return  # Gone again by the time the server looked it up
+        self.broker.publish(change["documentKey"]["_id"], make_event(
+            str(version["v"]), version.get("op"), version.get("ids")))
+
+    async def start(self) -> None:
+        """
+        Open the stream (raising if change streams aren't available) and start watching it.
+        """
+        stream = await self._open()
+        self._task = asyncio.create_task(self._watch(stream))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.live = False
+
+    async def _watch(self, stream) -> None:
+        while True:
+            try:
+                if stream is None:
+                    stream = await self._open()
+                    # Changes made while the stream was down may never arrive
+                    self.broker.publish_all(RESYNC_EVENT)
+                    logger.info("Todo change stream reopened.")
+                change = await stream.try_next()
+                if change is not None:
+                    self._dispatch(change)
+                self._resume_token = stream.resume_token
+            except asyncio.CancelledError:
+                if stream is not None:
+                    await stream.close()
+                raise
+            except PyMongoError as e:
+                # Writers publish locally until the stream is back
+                self.live = False
+                logger.warning(f"Todo change stream error: {e}")
+                if stream is not None:
+                    await stream.close()
+                    stream = None
+                else:
+                    # Can't resume from here (e.g. the token fell off the oplog); start afresh
+                    self._resume_token = None
+                await asyncio.sleep(1)
+
+
+async def start_todo_events() -> None:
+    """
+    Start the change stream watcher per `TODO_EVENTS_SOURCE`: `change_stream` requires it,
+    `auto` falls back to in-process events (each worker only sees its own writes) when the
+    database can't serve change streams, and `local` never tries.
+    """
+    source = get_settings().todo_events_source.lower()
+    if source == "local":
+        return
+    try:
+        await change_stream_watcher.start()
+        logger.info("Live todo updates: change stream.")
+    except Exception as e:
+        # Not just server errors: a client or driver stand-in without `watch()` fails differently
+        if source == "change_stream":
+            raise
+        logger.warning(
+            f"Change streams unavailable ({type(e).__name__}: {e}); live todo updates only reach clients on the worker that made the change.")
+
+
+async def stop_todo_events() -> None:
+    await change_stream_watcher.stop()
+
+
+async def record_todo_change(owner_id: str, op: str, ids: list[str] | None = None) -> None:
+    """
+    Call after every write to an owner's todos: bumps the list version (see `bump_todo_version`)
+    and tells the live update subscribers. With the change stream running they hear it from
+    there (whichever worker made the change); otherwise it is published in process.
+    """
+    if ids is not None and len(ids) > MAX_CHANGED_IDS:
+        ids = None
+    version = await bump_todo_version(owner_id, op, ids)
+    if not change_stream_watcher.live:
+        todo_event_broker.publish(owner_id, make_event(version, op, ids))
+
+
+todo_event_broker = TodoEventBroker(queue_size=get_settings().todo_events_queue_size)
+change_stream_watcher = ChangeStreamWatcher(todo_event_broker)
+
+REGISTRY.register_collector(lambda: [
+    ("todo_event_subscribers", "gauge", "Open live todo update streams on this worker.",
+     [({}, todo_event_broker.subscriber_count())]),
+    ("todo_events_published_total", "counter", "Live todo update events queued for subscribers.",
+     [({}, todo_event_broker.published)]),
+    ("todo_event_resyncs_total", "counter", "Subscribers that fell behind and were told to refetch.",
+     [({}, todo_event_broker.resyncs)]),
+    ("todo_change_stream_live", "gauge", "1 if this worker is fed by the todo change stream.",
+     [({}, int(change_stream_watcher.live))]),
+])
@@ -0,0 +1,54 @@
+import hashlib
+
+from bson import ObjectId
+
+from backend.config.db import LazyHandle
+from backend.config.settings import get_settings
+
+# Keep at most this many changed ids on a version; bigger changes just say "refetch"
+MAX_CHANGED_IDS = 100
+
+# One tiny document per owner: {"_id": owner_id, "v": <ObjectId of the last change>, "op", "ids"}
+# (`op`/`ids` describe the last change, for the live update feed in `backend.todo_events`)
+versions_collection = LazyHandle(
+    lambda client: client[get_settings().content_database][get_settings().todo_versions_collection])
+
+
+async def get_todo_version(owner_id: str) -> str:
+    """
+    The current change version of an owner's todo list ("0" if it never changed through the API).
+    """
+    version = await versions_collection.find_one({"_id": owner_id})
+    return str(version["v"]) if version else "0"
+
+
+async def bump_todo_version(owner_id: str, op: str | None = None, ids: list[str] | None = None) -> str:
+    """
+    Mark an owner's todo list as changed (by `op` on `ids`, when known) and return the new version.
+    Call *after* the write, so a concurrent reader can only ever pair the old version with new
+    data (harmless), never the reverse.
+    A fresh ObjectId (rather than a counter) keeps versions unique even if this collection is reset.
+    """
+    version = ObjectId()
+    if ids is not None and len(ids) > MAX_CHANGED_IDS:
+        ids = None
+    await versions_collection.update_one(
+        {"_id": owner_id}, {"$set": {"v": version, "op": op, "ids": ids}}, upsert=True)
+    return str(version)
+
+
+def make_etag(owner_id: str, version: str, variant: str = "") -> str:
+    """
+    Strong ETag for one view (`variant`, e.g. the query string) of an owner's todo list.
+    """
+    digest = hashlib.blake2b(
+        f"{owner_id}:{version}:{variant}".encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(etag: str, if_none_match: str | None) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/")
+                  for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
@@ -0,0 +1,85 @@
+import time
+import hashlib
+from collections import OrderedDict
+
+from backend.config.settings import get_settings
+from backend.metrics import REGISTRY
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of already-verified JWT claims, keyed by a digest of the raw token
+    (so we never hold the tokens themselves). An entry lives for at most `ttl_seconds`
+    and never past the token's own `exp`, so a cache hit can never resurrect an expired token.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, token: str) -> dict | None:
+        if self.max_entries <= 0:
+            return None
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return claims
+
+    def put(self, token: str, claims: dict, exp: float) -> None:
+        """
+        Cache `claims` for `token`, where `exp` is the token's expiry as a unix timestamp.
+        """
+        if self.max_entries <= 0:
+            return
+        expires_at = min(exp, time.time() + self.ttl_seconds)
+        key = self._key(token)
+        self._entries[key] = (expires_at, claims)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, token: str) -> None:
+        self._entries.pop(self._key(token), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# 0 entries = cache disabled
+token_cache = TokenCache(
+    max_entries=get_settings().token_cache_max_entries,
+    ttl_seconds=get_settings().token_cache_ttl_seconds,
+)
+
+
+REGISTRY.register_collector(lambda: [
+    ("token_cache_entries", "gauge", "Verified tokens currently cached.",
+     [({}, len(token_cache._entries))]),
+    ("token_cache_hits_total", "counter", "Token verifications answered from the cache.",
+     [({}, token_cache.hits)]),
+    ("token_cache_misses_total", "counter", "Token verifications that missed the cache.",
+     [({}, token_cache.misses)]),
+])
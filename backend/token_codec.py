@@ -0,0 +1,338 @@
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+from functools import lru_cache
+from typing import Callable
+
+from jose import jwt, JWTError, ExpiredSignatureError
+
+from backend.config.settings import get_settings
+
+from backend.log import get_logger
+logger = get_logger(__name__)
+
+
+class InvalidTokenError(Exception):
+    pass
+
+
+class ExpiredTokenError(InvalidTokenError):
+    pass
+
+
+class TokenCodec:
+    """
+    Turns a claims dict into a signed JWT and back. `decode()` verifies the signature and
+    `exp`, raising `ExpiredTokenError` / `InvalidTokenError`. `exp` is a unix timestamp.
+    """
+    name = "base"
+
+    def encode(self, claims: dict) -> str:
+        raise NotImplementedError
+
+    def decode(self, token: str) -> dict:
+        raise NotImplementedError
+
+
+class JoseTokenCodec(TokenCodec):
+    """
+    The original python-jose implementation; supports any algorithm jose does.
+    """
+    name = "jose"
+
+    def __init__(self, key: str, algorithm: str):
+        self.key = key
+        self.algorithm = algorithm
+
+    def encode(self, claims: dict) -> str:
+        return jwt.encode(claims=claims, key=self.key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        try:
+            return jwt.decode(token=token, key=self.key, algorithms=[self.algorithm])
+        except ExpiredSignatureError as e:
+            raise ExpiredTokenError(str(e)) from e
+        except JWTError as e:
+            raise InvalidTokenError(str(e)) from e
+
+
+def b64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def b64url_decode(data: bytes) -> bytes:
+    return base64.b64decode(data + b"=" * (-len(data) % 4), altchars=b"-_", validate=True)
+
+
+def encode_segment(value: dict) -> bytes:
+    return b64url_encode(json.dumps(value, separators=(",", ":"), sort_keys=True).encode())
+
+
+def decode_segment(segment: bytes) -> dict:
+    try:
+        value = json.loads(b64url_decode(segment))
+    except (ValueError, TypeError) as e:  # binascii.Error is a ValueError
+        raise InvalidTokenError("Malformed token segment.") from e
+    if not isinstance(value, dict):
+        raise InvalidTokenError("Token segment is not a JSON object.")
+    return value
+
+
+class CompactTokenCodec(TokenCodec):
+    """
+    JWS compact serialization (`header.payload.signature`) without a general-purpose JOSE
+    library in the way: headers are serialized once up front, a token whose header matches
+    one of ours is verified without parsing it, and `exp` stays an int throughout.
+    Subclasses provide the signing key(s).
+    """
+
+    def __init__(self):
+        # Header segment -> verify(signing_input, signature) for the headers we issue ourselves
+        self._verifiers: dict[bytes, Callable[[bytes, bytes], bool]] = {}
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        raise NotImplementedError
+
+    def _signing_header(self) -> bytes:
+        raise NotImplementedError
+
+    def _verifier_for(self, header: dict):
+        """
+        Verifier for a header we did not issue verbatim (e.g. from another JWT library), or None.
+        """
+        return None
+
+    def encode(self, claims: dict) -> str:
+        if "exp" in claims:
+            claims = {**claims, "exp": int(claims["exp"])}
+        signing_input = self._signing_header() + b"." + encode_segment(claims)
+        return (signing_input + b"." + b64url_encode(self._sign(signing_input))).decode()
+
+    def decode(self, token: str) -> dict:
+        try:
+            raw = token.encode("ascii")
+        except (UnicodeEncodeError, AttributeError) as e:
+            raise InvalidTokenError("Token is not ASCII.") from e
+        signing_input, _, signature = raw.rpartition(b".")
+        header_segment, dot, payload_segment = signing_input.partition(b".")
+        if not dot or not payload_segment:
+            raise InvalidTokenError("Token is not a compact JWS.")
+
+        verify = self._verifiers.get(header_segment)
+        if verify is None:
+            verify = self._verifier_for(decode_segment(header_segment))
+            if verify is None:
+                raise InvalidTokenError("Unsupported token header.")
+        try:
+            ok = verify(signing_input, b64url_decode(signature))
+        except (ValueError, TypeError):
+            ok = False
+        if not ok:
+            raise InvalidTokenError("Signature verification failed.")
+
+        claims = decode_segment(payload_segment)
+        now = time.time()
+        exp = claims.get("exp")
+        if exp is not None:
+            if not isinstance(exp, (int, float)):
+                raise InvalidTokenError("Invalid `exp` claim.")
+            if exp <= now:
+                raise ExpiredTokenError("Signature has expired.")
+        nbf = claims.get("nbf")
+        if isinstance(nbf, (int, float)) and nbf > now:
+            raise InvalidTokenError("Token is not yet valid.")
+        return claims
+
+
+class HS256TokenCodec(CompactTokenCodec):
+    """
+    Fast HS256: the HMAC key schedule is computed once and copied per token.
+    Tokens are interchangeable with `JoseTokenCodec(key, "HS256")`.
+    """
+    name = "hs256"
+
+    def __init__(self, key: str):
+        super().__init__()
+        self._hmac = hmac.new(key.encode(), digestmod=hashlib.sha256)
+        self._header = encode_segment({"alg": "HS256", "typ": "JWT"})
+        # jose writes this exact header too, so its tokens take the fast path as well
+        self._verifiers[self._header] = self._verify
+
+    def _signing_header(self) -> bytes:
+        return self._header
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        mac = self._hmac.copy()
+        mac.update(signing_input)
+        return mac.digest()
+
+    def _verify(self, signing_input: bytes, signature: bytes) -> bool:
+        return hmac.compare_digest(self._sign(signing_input), signature)
+
+    def _verifier_for(self, header: dict):
+        return self._verify if header.get("alg") == "HS256" else None
+
+
+class KeySetTokenCodec(CompactTokenCodec):
+    """
+    Asymmetric signing (RS256 for RSA keys, ES256 for P-256 keys) with a key set: tokens
+    carry the `kid` of the key that signed them, so keys can be rotated without logging
+    anyone out. To rotate: add the new key, switch `TOKEN_SIGNING_KID` to it, and remove
+    the old one once the last token it signed has expired.
+    `keys` maps kid -> private key (can sign and verify) or public key (verify only).
+    """
+    name = "keyset"
+
+    def __init__(self, keys: dict, signing_kid: str):
+        super().__init__()
+        from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+        if signing_kid not in keys:
+            raise ValueError(f"Signing key '{signing_kid}' is not in the key set.")
+        self._verifiers_by_kid = {}
+        for kid, key in keys.items():
+            if isinstance(key, (rsa.RSAPrivateKey, ec.EllipticCurvePrivateKey)):
+                public_key = key.public_key()
+            else:
+                public_key = key
+            if isinstance(public_key, rsa.RSAPublicKey):
+                algorithm, verify = "RS256", _rsa_verifier(public_key)
+            elif isinstance(public_key, ec.EllipticCurvePublicKey) and public_key.curve.name == "secp256r1":
+                algorithm, verify = "ES256", _ec_verifier(public_key)
+            else:
+                raise ValueError(f"Key '{kid}' is not an RSA or P-256 key.")
+            self._verifiers_by_kid[kid] = (algorithm, verify)
+            self._verifiers[encode_segment(
+                {"alg": algorithm, "kid": kid, "typ": "JWT"})] = verify
+            if kid == signing_kid:
+                if public_key is key:
+                    raise ValueError(f"Signing key '{kid}' has no private half.")
+                self._header = encode_segment(
+                    {"alg": algorithm, "kid": kid, "typ": "JWT"})
+                self._signer = _rsa_signer(key) if algorithm == "RS256" else _ec_signer(key)
+        self.signing_kid = signing_kid
+
+    def _signing_header(self) -> bytes:
+        return self._header
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        return self._signer(signing_input)
+
+    def _verifier_for(self, header: dict):
+        algorithm, verify = self._verifiers_by_kid.get(header.get("kid"), (None, None))
+        return verify if algorithm is not None and header.get("alg") == algorithm else None
+
+
+def _rsa_signer(private_key):
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+
+    def sign(signing_input: bytes) -> bytes:
+        return private_key.sign(signing_input, padding.PKCS1v15(), hashes.SHA256())
+    return sign
+
+
+def _rsa_verifier(public_key):
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+
+    def verify(signing_input: bytes, signature: bytes) -> bool:
+        try:
+            public_key.verify(signature, signing_input,
+                              padding.PKCS1v15(), hashes.SHA256())
+            return True
+        except InvalidSignature:
+            return False
+    return verify
+
+
+def _ec_signer(private_key):
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+
+    def sign(signing_input: bytes) -> bytes:
+        # JWS wants the raw 64-byte r || s, not DER
+        r, s = decode_dss_signature(private_key.sign(
+            signing_input, ec.ECDSA(hashes.SHA256())))
+        return r.to_bytes(32, "big") + s.to_bytes(32, "big")
+    return sign
+
+
+def _ec_verifier(public_key):
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+
+    def verify(signing_input: bytes, signature: bytes) -> bool:
+        if len(signature) != 64:
+            return False
+        der = encode_dss_signature(int.from_bytes(signature[:32], "big"),
+                                   int.from_bytes(signature[32:], "big"))
+        try:
+            public_key.verify(der, signing_input, ec.ECDSA(hashes.SHA256()))
+            return True
+        except InvalidSignature:
+            return False
+    return verify
+
+
+def load_key_set(directory: str) -> dict:
+    """
+    Load a key set from PEM files named after their kid: `<kid>.pem` holds a private key,
+    `<kid>.pub.pem` a verify-only public key (e.g. a retired key whose private half is gone).
+    """
+    from cryptography.hazmat.primitives.serialization import (
+        load_pem_private_key,
+        load_pem_public_key,
+    )
+
+    keys = {}
+    for filename in sorted(os.listdir(directory)):
+        path = os.path.join(directory, filename)
+        with open(path, "rb") as f:
+            data = f.read()
+        if filename.endswith(".pub.pem"):
+            keys.setdefault(filename.removesuffix(".pub.pem"),
+                            load_pem_public_key(data))
+        elif filename.endswith(".pem"):
+            keys[filename.removesuffix(".pem")] = load_pem_private_key(
+                data, password=None)
+    return keys
+
+
+def build_token_codec(settings) -> TokenCodec:
+    codec = settings.token_codec.lower()
+    if codec == "jose":
+        return JoseTokenCodec(settings.backend_secret_key, settings.backend_algorithm)
+    if codec == "hs256":
+        if settings.backend_algorithm != "HS256":
+            raise RuntimeError(
+                f"TOKEN_CODEC=hs256 needs BACKEND_ALGORITHM=HS256 (got {settings.backend_algorithm}); use TOKEN_CODEC=jose.")
+        return HS256TokenCodec(settings.backend_secret_key)
+    if codec == "keyset":
+        keys = load_key_set(settings.token_keyset_dir)
+        # Only private keys can sign; default to the last kid in sort order,
+        # so date-named keys (e.g. `2026-10.pem`) rotate by adding a file
+        signing_kids = sorted(kid for kid, key in keys.items() if hasattr(key, "sign"))
+        if not signing_kids:
+            raise RuntimeError(
+                f"No private keys found in {settings.token_keyset_dir}.")
+        signing_kid = settings.token_signing_kid or signing_kids[-1]
+        logger.info(
+            f"Loaded {len(keys)} token keys; signing with '{signing_kid}'.")
+        return KeySetTokenCodec(keys, signing_kid)
+    raise RuntimeError(f"Unknown TOKEN_CODEC: {settings.token_codec}")
+
+
+@lru_cache
+def get_token_codec() -> TokenCodec:
+    """
+    The configured codec (`TOKEN_CODEC`), built on first use.
+    """
+    return build_token_codec(get_settings())
@@ -0,0 +1,162 @@
+import os
+import time
+import socket
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+from backend.models.user_model import User
+from backend.config.db import users_db
+from backend.config.settings import get_settings
+from backend.metrics import REGISTRY
+
+from backend.log import get_logger
+logger = get_logger(__name__)
+
+
+class UserCache:
+    """
+    Bounded, TTL'd LRU of authenticated `User` objects keyed by user id.
+    Anything that changes a user document must call `invalidate_user()` afterwards.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, User]] = OrderedDict()
+
+    def get(self, user_id: str) -> User | None:
+        if self.max_entries <= 0:
+            return None
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return user
+
+    def put(self, user_id: str, user: User) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, user)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class MongoInvalidationChannel:
+    """
+    Broadcasts user-cache invalidations to every worker through a small capped collection.
+    Each worker tails it and drops the named users from its own cache.
+    """
+
+    def __init__(self, collection_name: str, cache: UserCache, size_bytes: int = 1024 * 1024):
+        self.collection_name = collection_name
+        self.cache = cache
+        self.size_bytes = size_bytes
+        self.origin = f"{socket.gethostname()}:{os.getpid()}"
+        self._task: asyncio.Task | None = None
+
+    @property
+    def collection(self):
+        return users_db[self.collection_name]
+
+    async def publish(self, user_id: str) -> None:
+        await self.collection.insert_one({"user_id": user_id, "origin": self.origin})
+
+    async def ensure_collection(self) -> None:
+        # Must be capped for the tailable cursors, so create it before anything inserts into it
+        try:
+            await users_db.create_collection(
+                self.collection_name, capped=True, size=self.size_bytes)
+        except CollectionInvalid:
+            pass  # Already exists
+
+    async def start(self) -> None:
+        await self.ensure_collection()
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _listen(self) -> None:
+        # Only replay invalidations from (just before) the time we started listening
+        last_id = ObjectId.from_datetime(
+            datetime.utcnow() - timedelta(seconds=1))
+        while True:
+            try:
+                cursor = self.collection.find(
+                    {"_id": {"$gt": last_id}},
+                    cursor_type=CursorType.TAILABLE_AWAIT,
+                )
+                while cursor.alive:
+                    async for event in cursor:
+                        last_id = event["_id"]
+                        if event.get("origin") != self.origin:
+                            self.cache.invalidate(event["user_id"])
+                    # Tailable cursors on an empty collection die straight away
+                    await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                logger.warning(f"User cache invalidation listener error: {e}")
+            await asyncio.sleep(1)
+
+
+# 0 entries = cache disabled
+user_cache = UserCache(
+    max_entries=get_settings().user_cache_max_entries,
+    ttl_seconds=get_settings().user_cache_ttl_seconds,
+)
+
+# Cross-worker invalidation: "none" (this worker only) or "mongo" (capped collection)
+invalidation_channel = None
+if get_settings().user_cache_invalidation_channel.lower() == "mongo":
+    invalidation_channel = MongoInvalidationChannel(
+        get_settings().user_cache_invalidation_collection, user_cache)
+
+REGISTRY.register_collector(lambda: [
+    ("user_cache_entries", "gauge", "Authenticated users currently cached.",
+     [({}, len(user_cache._entries))]),
+    ("user_cache_hits_total", "counter", "User lookups answered from the cache.",
+     [({}, user_cache.hits)]),
+    ("user_cache_misses_total", "counter", "User lookups that missed the cache.",
+     [({}, user_cache.misses)]),
+])
+
+
+async def invalidate_user(user_id: str) -> None:
+    """
+    Write-through invalidation: call after any write that changes a user's document
+    (registration, refresh-token updates, profile edits, ...).
+    """
+    user_cache.invalidate(user_id)
+    if invalidation_channel is not None:
+        await invalidation_channel.publish(user_id)
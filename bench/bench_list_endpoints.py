@@ -0,0 +1,154 @@
+"""
+Benchmark: requests per second of list endpoints returning 1k-item payloads, old vs. lean serialization.
+
+Drives small FastAPI apps straight through the ASGI interface (no sockets, no database: the
+documents are built up front), so only the response path is measured:
+- todos, old: a validated `TodoItem` per document, returned as a `TodoPage` (which FastAPI
+  validates again and encodes with `jsonable_encoder` + `json`);
+- todos, lean: `todo_item()` dicts in an `ORJSONResponse`, as `GET /api/v1/todo/` does now;
+- users, old / lean: the same for a list of users, as validated `User`s (password hash
+  included) vs. `UserPublic`-shaped dicts.
+It also times building one `User` from a document with validation vs. `User.model_construct()`:
+for a model this small, pydantic-core validation is the faster of the two (which is why
+`backend.auth.get_user_from_db` validates); the win is in not building models per item at all.
+
+Usage:
+    python -m bench.bench_list_endpoints [--items 1000] [--requests 500]
+
+Needs no database or `.env`.
+"""
+import argparse
+import asyncio
+import time
+
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from rich import print
+
+from backend.models.todo_model import TodoItem, TodoPage
+from backend.models.user_model import User, UserPublic
+from backend.routes.todo_routes import todo_item
+
+
+def make_todos(n: int) -> list[dict]:
+    return [{
+        "_id": ObjectId(),
+        "name": f"Todo number {i}",
+        "description": "Pick up the groceries, then walk the dog around the block twice.",
+        "task_complete": i % 3 == 0,
+    } for i in range(n)]
+
+
+def make_users(n: int) -> list[dict]:
+    return [{
+        "_id": ObjectId(),
+        "email": f"user{i}@example.com",
+        "password": "$2b$12$" + "x" * 53,
+    } for i in range(n)]
+
+
+def build_app(todos: list[dict], users: list[dict]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/todos/old")
+    async def todos_old() -> TodoPage:
+        return TodoPage(todos=[
+            TodoItem(
+                id=str(todo_data["_id"]),
+                name=todo_data["name"],
+                description=todo_data["description"],
+                task_complete=todo_data["task_complete"],
+            )
+            for todo_data in todos
+        ], next_cursor=None)
+
+    @app.get("/todos/lean", response_model=TodoPage)
+    async def todos_lean():
+        return ORJSONResponse({"todos": [todo_item(todo_data) for todo_data in todos], "next_cursor": None})
+
+    @app.get("/users/old")
+    async def users_old() -> list[User]:
+        return [User(**user_data, user_id=str(user_data["_id"])) for user_data in users]
+
+    @app.get("/users/lean", response_model=list[UserPublic])
+    async def users_lean():
+        return ORJSONResponse([
+            {"email": user_data["email"], "user_id": str(user_data["_id"])}
+            for user_data in users
+        ])
+
+    return app
+
+
+async def drive(app, path: str, n_requests: int) -> tuple[float, int]:
+    """
+    Returns (requests per second, response body size in bytes).
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+    body_size = 0
+
+    async def send(message):
+        nonlocal body_size
+        if message["type"] == "http.response.body":
+            body_size = len(message.get("body", b""))
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    start = time.perf_counter()
+    for _ in range(n_requests):
+        await app(dict(scope), receive, send)
+    return n_requests / (time.perf_counter() - start), body_size
+
+
+def construct_rate(build, users: list[dict], n_ops: int) -> float:
+    start = time.perf_counter()
+    for i in range(n_ops):
+        build(users[i % len(users)])
+    return n_ops / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    app = build_app(make_todos(args.items), make_users(args.items))
+    print(f"items={args.items} requests={args.requests}")
+    for resource in ("todos", "users"):
+        rates = {}
+        for variant in ("old", "lean"):
+            path = f"/{resource}/{variant}"
+            await drive(app, path, 20)  # warm-up
+            rates[variant], body_size = await drive(app, path, args.requests)
+            print(f"  {path:<12} {rates[variant]:>8,.0f} req/s  ({body_size:,} bytes)")
+        print(f"  {resource}: {rates['lean'] / rates['old']:.1f}x")
+
+    users = make_users(args.items)
+    validated = construct_rate(
+        lambda user_data: User(**user_data, user_id=str(user_data["_id"])), users, 100_000)
+    trusted = construct_rate(
+        lambda user_data: User.model_construct(
+            email=user_data["email"], password=user_data.get("password"), user_id=str(user_data["_id"])),
+        users, 100_000)
+    print(f"  User(**doc) {validated:>10,.0f}/s   User.model_construct() {trusted:>10,.0f}/s"
+          f"  ({trusted / validated:.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
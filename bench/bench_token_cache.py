@@ -0,0 +1,59 @@
+"""
+Benchmark: `backend.auth.verify_access_token` throughput with and without the verified-token cache.
+
+Simulates N active sessions, each re-presenting its access token on every request,
+and reports verifications per second for a cold (disabled) and a warm cache.
+
+Usage:
+    python -m bench.bench_token_cache [--sessions 1000] [--requests 200000]
+
+Needs the same environment (.env) as the server, since it imports `backend.auth`.
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from rich import print
+
+from backend import auth
+from backend.token_cache import TokenCache
+
+
+def run(tokens: list[str], n_requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n_requests):
+        auth.verify_access_token(random.choice(tokens))
+    return n_requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    tokens = [
+        auth.create_access_token(
+            email=f"user{i}@example.com",
+            id=f"{i:024x}",
+            expires_delta=timedelta(minutes=30),
+        )
+        for i in range(args.sessions)
+    ]
+
+    auth.token_cache = TokenCache(max_entries=0, ttl_seconds=0)
+    uncached = run(tokens, args.requests)
+
+    auth.token_cache = TokenCache(
+        max_entries=args.sessions * 2, ttl_seconds=300)
+    cached = run(tokens, args.requests)
+
+    print(f"sessions={args.sessions} requests={args.requests}")
+    print(f"  no cache : {uncached:>12,.0f} verifies/s")
+    print(f"  cache    : {cached:>12,.0f} verifies/s  ({cached / uncached:.1f}x)")
+    print(f"  counters : {auth.token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: user lookup by email as the users collection grows.
+
+Seeds a scratch database with N users (1k -> 1M by default) and times the indexed
+`find_one` used by `backend.auth.get_user_from_db` against the old full-collection scan.
+The scan is only timed up to `--scan-limit` users, since past that it just takes forever.
+
+Usage:
+    python -m bench.bench_user_lookup [--uri mongodb://localhost:27017] [--sizes 1000,10000,100000,1000000]
+
+WARNING: drops and rebuilds the `bench_user_lookup` database on the target server!
+"""
+import argparse
+import random
+import statistics
+import time
+
+from rich import print
+from pymongo import ASCENDING, MongoClient
+
+BENCH_DATABASE = "bench_user_lookup"
+BENCH_COLLECTION = "users"
+INSERT_BATCH = 10_000
+
+# Same query shape as `backend.auth.get_user_from_db`
+USER_PROJECTION = {"email": 1, "password": 1}
+
+
+def seed(collection, start: int, stop: int) -> None:
+    batch = []
+    for i in range(start, stop):
+        batch.append({
+            "email": f"user{i}@example.com",
+            "password": "$2b$12$" + "x" * 53,
+        })
+        if len(batch) == INSERT_BATCH:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+
+def time_lookups(lookup, n_users: int, n_lookups: int) -> list[float]:
+    timings = []
+    for _ in range(n_lookups):
+        email = f"user{random.randrange(n_users)}@example.com"
+        start = time.perf_counter()
+        lookup(email)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--scan-limit", type=int, default=10_000)
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri)
+    client.drop_database(BENCH_DATABASE)
+    collection = client[BENCH_DATABASE][BENCH_COLLECTION]
+    collection.create_index([("email", ASCENDING)],
+                            name="email_unique", unique=True)
+
+    def indexed(email):
+        return collection.find_one({"email": email}, projection=USER_PROJECTION)
+
+    def scan(email):
+        for user_data in collection.find():
+            if user_data["email"] == email:
+                return user_data
+
+    print(f"{'users':>10} {'indexed p50':>12} {'indexed p99':>12} {'scan p50':>12}")
+    seeded = 0
+    for size in sorted(int(s) for s in args.sizes.split(",")):
+        seed(collection, seeded, size)
+        seeded = size
+
+        timings = time_lookups(indexed, size, args.lookups)
+        p50 = statistics.median(timings)
+        p99 = statistics.quantiles(timings, n=100)[98]
+        if size <= args.scan_limit:
+            scan_p50 = f"{statistics.median(time_lookups(scan, size, 20)):>10.3f}ms"
+        else:
+            scan_p50 = f"{'(skipped)':>12}"
+        print(f"{size:>10} {p50:>10.3f}ms {p99:>10.3f}ms {scan_p50}")
+
+    client.drop_database(BENCH_DATABASE)
+
+
+if __name__ == "__main__":
+    main()
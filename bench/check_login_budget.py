@@ -0,0 +1,76 @@
+"""
+Check: the email/password login path stays within its DB-operation budget.
+
+Registers a throwaway user, then logs in through the real `server:app` (in-process, over
+ASGI) while counting every Mongo command with `count_db_operations()`, and fails if a
+successful login costs more than LOGIN_READ_BUDGET reads + LOGIN_WRITE_BUDGET writes.
+
+Usage:
+    python -m bench.check_login_budget [--uri mongodb://localhost:27017]
+    npm run check_login_budget
+
+This is the login budget's regression check (the repo has no test suite); run it before
+merging anything that touches the login path. Exits non-zero when over budget.
+Needs a reachable mongod (the in-memory stand-in emits no command events to count);
+uses (and drops) its own `bench_login_budget_*` databases.
+"""
+import os
+import sys
+import asyncio
+import argparse
+
+LOGIN_READ_BUDGET = 1
+LOGIN_WRITE_BUDGET = 1
+
+READ_COMMANDS = {"find", "getMore", "aggregate", "count", "distinct"}
+WRITE_COMMANDS = {"insert", "update", "delete", "findAndModify"}
+
+
+async def check() -> bool:
+    import httpx
+    from rich import print
+
+    import server
+    from backend.config.db import get_client, count_db_operations
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async with server.lifespan(server.app):
+            await client.post("/user/register", json={"email": "budget@example.com", "password": "pw"})
+
+            with count_db_operations() as db_operations:
+                response = await client.post(
+                    "/user/login", data={"username": "budget@example.com", "password": "pw"})
+
+            for db_name in (os.environ["USERS_DATABASE"], os.environ["CONTENT_DATABASE"]):
+                await get_client().drop_database(db_name)
+
+    reads = [op for op in db_operations.operations if op[0] in READ_COMMANDS]
+    writes = [op for op in db_operations.operations if op[0] in WRITE_COMMANDS]
+    print(f"login -> HTTP {response.status_code}")
+    print(f"  reads : {len(reads)} / {LOGIN_READ_BUDGET}  {reads}")
+    print(f"  writes: {len(writes)} / {LOGIN_WRITE_BUDGET}  {writes}")
+    print(f"  total : {db_operations.count}  {db_operations.operations}")
+    ok = (response.status_code == 302
+          and len(reads) <= LOGIN_READ_BUDGET
+          and len(writes) <= LOGIN_WRITE_BUDGET)
+    print("[green]OK: login is within budget[/green]" if ok else "[red]FAIL: login is over budget[/red]")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    args = parser.parse_args()
+
+    # Point the app at scratch databases *before* its settings are first read
+    os.environ["MONGO_URI"] = args.uri
+    os.environ["USERS_DATABASE"] = "bench_login_budget_users"
+    os.environ["CONTENT_DATABASE"] = "bench_login_budget_content"
+    os.environ["USER_CACHE_INVALIDATION_CHANNEL"] = "none"
+
+    sys.exit(0 if asyncio.run(check()) else 1)
+
+
+if __name__ == "__main__":
+    main()
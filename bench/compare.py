@@ -0,0 +1,66 @@
+"""
+Compare two `bench.loadtest` result files and flag regressions.
+
+An endpoint regresses when its p95 latency grows, or its requests per second drop, by more
+than `--threshold` percent. Exits non-zero if anything regressed, so it can gate CI.
+
+Usage:
+    python -m bench.compare baseline.json candidate.json [--threshold 10]
+"""
+import sys
+import json
+import argparse
+
+from rich import print
+
+METRICS = ("rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="allowed regression, in percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    print(f"baseline {baseline['meta'].get('commit')} -> candidate {candidate['meta'].get('commit')}")
+    if baseline["meta"]["config"] != candidate["meta"]["config"]:
+        print("[yellow]WARNING: the two runs used different configurations.[/yellow]")
+
+    print(f"{'endpoint':>16} " + " ".join(f"{m:>18}" for m in METRICS))
+    regressions = []
+    old_endpoints = dict(baseline["endpoints"], TOTAL=baseline["total"])
+    new_endpoints = dict(candidate["endpoints"], TOTAL=candidate["total"])
+    for name, old in old_endpoints.items():
+        new = new_endpoints.get(name)
+        if new is None:
+            continue
+        cells = []
+        for metric in METRICS:
+            delta = change(old[metric], new[metric])
+            cells.append(f"{new[metric]:>9.2f} ({delta:+6.1f}%)")
+        print(f"{name:>16} " + " ".join(cells))
+        if change(old["p95_ms"], new["p95_ms"]) > args.threshold:
+            regressions.append(f"{name}: p95 {old['p95_ms']} -> {new['p95_ms']} ms")
+        if -change(old["rps"], new["rps"]) > args.threshold:
+            regressions.append(f"{name}: rps {old['rps']} -> {new['rps']}")
+
+    if regressions:
+        print(f"[red]{len(regressions)} regression(s) over {args.threshold}%:[/red]")
+        for regression in regressions:
+            print(f"  [red]{regression}[/red]")
+        sys.exit(1)
+    print("[green]No regressions.[/green]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Stub GitHub OAuth server, so load runs and tests never talk to github.com.
+
+Implements the two endpoints `github_code` calls: the code-for-token exchange and the
+user-info lookup. Point the app at it with:
+
+    GITHUB_TOKEN_URL=http://127.0.0.1:9797/login/oauth/access_token
+    GITHUB_API_URL=http://127.0.0.1:9797
+
+Usage:
+    python -m bench.github_stub [--port 9797] [--latency-ms 0]
+"""
+import asyncio
+import argparse
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+def build_app(latency_ms: float = 0.0) -> Starlette:
+    async def simulate_latency():
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+    async def access_token(request: Request):
+        await simulate_latency()
+        code = request.query_params.get("code", "")
+        return JSONResponse({"access_token": f"stub-{code}", "token_type": "bearer", "scope": ""})
+
+    async def user(request: Request):
+        await simulate_latency()
+        if not request.headers.get("authorization", "").startswith("Bearer "):
+            return JSONResponse({"message": "Requires authentication"}, status_code=401)
+        return JSONResponse({"id": 1, "login": "stub-user", "email": None})
+
+    return Starlette(routes=[
+        Route("/login/oauth/access_token", access_token, methods=["POST"]),
+        Route("/user", user, methods=["GET"]),
+    ])
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9797)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(build_app(args.latency_ms), host=args.host,
+                port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
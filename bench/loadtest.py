@@ -0,0 +1,411 @@
+"""
+Load test: drive `server:app` with a realistic request mix and report latency per endpoint.
+
+Starts the app (in this process with uvicorn, or with `--spawn` as a separate multi-worker
+uvicorn process) against an in-memory Mongo stand-in (`--mongo memory`, needs the
+`mongomock-motor` package) or a real mongod (`--mongo mongodb://...`), plus the stub GitHub
+OAuth server from `bench/github_stub.py`. Seeds N users with M todos each, then runs
+`--concurrency` virtual users for `--duration` seconds, each looping over a weighted mix of
+register, login, profile, todo CRUD, token refresh and GitHub callback requests.
+
+Results (p50/p95/p99 latency and requests per second per endpoint) are printed and written
+as JSON, which `python -m bench.compare old.json new.json` diffs between commits.
+
+Usage:
+    python -m bench.loadtest [--mongo memory] [--users 1000] [--todos 20] [--concurrency 32]
+                             [--duration 30] [--out bench_results.json]
+    python -m bench.loadtest --mongo mongodb://localhost:27017 --spawn --workers 4
+
+Needs the same environment (.env) as the server. Uses (and drops) its own `bench_*` databases.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+BENCH_PASSWORD = "bench-password"
+BENCH_USERS_DATABASE = "bench_loadtest_users"
+BENCH_CONTENT_DATABASE = "bench_loadtest_content"
+SEED_BATCH = 5000
+
+DEFAULT_MIX = {
+    "register": 1,
+    "login": 4,
+    "profile": 20,
+    "list_todos": 30,
+    "create_todo": 10,
+    "update_todo": 10,
+    "delete_todo": 5,
+    "refresh": 5,
+    "github_callback": 2,
+}
+
+
+# ------------------------------------------------------------------------
+# Stats
+# ------------------------------------------------------------------------
+
+class Stats:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.recording = False
+
+    def record(self, name: str, elapsed_ms: float, ok: bool) -> None:
+        if not self.recording:
+            return
+        self.samples.setdefault(name, []).append(elapsed_ms)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    # Nearest-rank percentile of an already sorted list
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(samples: list[float], errors: int, duration: float) -> dict:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / duration, 2),
+        "mean_ms": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50), 3),
+        "p95_ms": round(percentile(ordered, 95), 3),
+        "p99_ms": round(percentile(ordered, 99), 3),
+        "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+    }
+
+
+# ------------------------------------------------------------------------
+# Virtual users
+# ------------------------------------------------------------------------
+
+class VirtualUser:
+    def __init__(self, client, stats: Stats, email: str, rng: random.Random):
+        self.client = client
+        self.stats = stats
+        self.email = email
+        self.rng = rng
+        self.todo_ids: list[str] = []
+
+    async def timed(self, name: str, request, expected: tuple = (200,)):
+        time_start = time.perf_counter()
+        try:
+            response = await request
+        except Exception:
+            self.stats.record(name, (time.perf_counter() - time_start) * 1000, False)
+            return None
+        self.stats.record(name, (time.perf_counter() - time_start) * 1000,
+                          response.status_code in expected)
+        return response
+
+    async def register(self):
+        email = f"new-{uuid.uuid4().hex}@bench.example.com"
+        await self.timed("register", self.client.post(
+            "/user/register", json={"email": email, "password": BENCH_PASSWORD}), (201,))
+
+    async def login(self):
+        await self.timed("login", self.client.post(
+            "/user/login", data={"username": self.email, "password": BENCH_PASSWORD}), (302,))
+
+    async def profile(self):
+        await self.timed("profile", self.client.get("/user/profile"))
+
+    async def list_todos(self):
+        response = await self.timed("list_todos", self.client.get("/api/v1/todo/", params={"limit": 50}))
+        if response is not None and response.status_code == 200:
+            self.todo_ids = [todo["id"] for todo in response.json()["todos"]]
+
+    async def create_todo(self):
+        todo = {"name": "bench", "description": "created by the load test",
+                "task_complete": False, "owner_id": ""}
+        await self.timed("create_todo", self.client.post("/api/v1/todo/", json=todo), (201,))
+
+    async def update_todo(self):
+        if not self.todo_ids:
+            return await self.list_todos()
+        todo = {"name": "bench (edited)", "description": "updated by the load test",
+                "task_complete": self.rng.random() < 0.5, "owner_id": ""}
+        await self.timed("update_todo", self.client.put(
+            f"/api/v1/todo/{self.rng.choice(self.todo_ids)}", json=todo))
+
+    async def delete_todo(self):
+        if not self.todo_ids:
+            return await self.list_todos()
+        todo_id = self.todo_ids.pop(self.rng.randrange(len(self.todo_ids)))
+        await self.timed("delete_todo", self.client.delete(f"/api/v1/todo/{todo_id}"))
+
+    async def refresh(self):
+        cookie = self.client.cookies.get("refresh_token", "")
+        refresh_token = cookie.strip('"').removeprefix("Bearer ")
+        await self.timed("refresh", self.client.post(
+            "/user/refresh_token", params={"refresh_token": refresh_token}))
+
+    async def github_callback(self):
+        await self.timed("github_callback", self.client.get(
+            "/user/oauth/get-github-code", params={"code": uuid.uuid4().hex}))
+
+
+async def run_virtual_user(base_url: str, stats: Stats, email: str, mix: dict, deadline: float, seed: int):
+    import httpx
+
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        user = VirtualUser(client, stats, email, rng)
+        await user.login()
+        while time.perf_counter() < deadline:
+            await getattr(user, rng.choices(names, weights)[0])()
+
+
+# ------------------------------------------------------------------------
+# Servers & seeding
+# ------------------------------------------------------------------------
+
+def embedded_server(app, port: int):
+    import uvicorn
+
+    class EmbeddedServer(uvicorn.Server):
+        # Leave Ctrl+C to the load test
+        def install_signal_handlers(self):
+            pass
+
+    return EmbeddedServer(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+
+
+async def wait_until_up(url: str, timeout: float = 30) -> None:
+    import httpx
+
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                if time.perf_counter() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+
+
+async def seed(users_collection, content_collection, n_users: int, n_todos: int) -> list[str]:
+    from bson import ObjectId
+    from passlib.context import CryptContext
+
+    # Every bench user shares one password, so we only pay for one bcrypt hash here
+    password_hash = CryptContext(schemes=["bcrypt"]).hash(BENCH_PASSWORD)
+    emails = []
+    users, todos = [], []
+    for i in range(n_users):
+        user_id = ObjectId()
+        email = f"bench{i}@bench.example.com"
+        emails.append(email)
+        users.append({"_id": user_id, "email": email,
+                      "password": password_hash})
+        for j in range(n_todos):
+            todos.append({"name": f"todo {j}", "description": f"seeded todo {j} of {email}",
+                          "task_complete": j % 3 == 0, "owner_id": str(user_id)})
+        if len(users) >= SEED_BATCH:
+            await users_collection.insert_many(users, ordered=False)
+            users = []
+        if len(todos) >= SEED_BATCH:
+            await content_collection.insert_many(todos, ordered=False)
+            todos = []
+    if users:
+        await users_collection.insert_many(users, ordered=False)
+    if todos:
+        await content_collection.insert_many(todos, ordered=False)
+    return emails
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ------------------------------------------------------------------------
+# Main
+# ------------------------------------------------------------------------
+
+async def run(args, mix: dict) -> dict:
+    from rich import print
+
+    stub_base = f"http://127.0.0.1:{args.stub_port}"
+    base_url = f"http://127.0.0.1:{args.port}"
+    os.environ.update({
+        "USERS_DATABASE": BENCH_USERS_DATABASE,
+        "CONTENT_DATABASE": BENCH_CONTENT_DATABASE,
+        "GITHUB_TOKEN_URL": f"{stub_base}/login/oauth/access_token",
+        "GITHUB_API_URL": stub_base,
+        # Every virtual user logs in from 127.0.0.1, which the login throttle would stop
+        "RATE_LIMIT_ENABLED": "1" if args.rate_limits else "0",
+    })
+    if args.mongo != "memory":
+        os.environ["MONGO_URI"] = args.mongo
+    else:
+        # The in-memory stand-in has no change streams
+        os.environ["TODO_EVENTS_SOURCE"] = "local"
+
+    from bench.github_stub import build_app as build_github_stub
+    stub = embedded_server(build_github_stub(args.stub_latency_ms), args.stub_port)
+    stub_task = asyncio.create_task(stub.serve())
+
+    server_process = None
+    if args.spawn:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from backend.config.settings import get_settings
+
+        mongo = AsyncIOMotorClient(args.mongo)
+        await mongo.drop_database(BENCH_USERS_DATABASE)
+        await mongo.drop_database(BENCH_CONTENT_DATABASE)
+        server_process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1",
+             "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning"],
+            env=dict(os.environ),
+        )
+        await wait_until_up(f"{base_url}/favicon.ico")
+        # Resolved like the server resolves them (both are optional, with defaults)
+        settings = get_settings()
+        users_collection = mongo[BENCH_USERS_DATABASE][settings.users_collection]
+        content_collection = mongo[BENCH_CONTENT_DATABASE][settings.content_collection]
+    else:
+        import server
+        from backend.config.db import get_client, set_client, users_collection, content_collection
+
+        if args.mongo == "memory":
+            # Install the in-memory stand-in before anything creates the real client
+            from mongomock_motor import AsyncMongoMockClient
+            set_client(AsyncMongoMockClient())
+        await get_client().drop_database(BENCH_USERS_DATABASE)
+        await get_client().drop_database(BENCH_CONTENT_DATABASE)
+        app_server = embedded_server(server.app, args.port)
+        app_task = asyncio.create_task(app_server.serve())
+        await wait_until_up(f"{base_url}/favicon.ico")
+
+    print(f"[yellow]Seeding {args.users} users x {args.todos} todos...[/yellow]")
+    emails = await seed(users_collection, content_collection, args.users, args.todos)
+
+    stats = Stats()
+    time_start = time.perf_counter()
+    deadline = time_start + args.warmup + args.duration
+    print(f"[yellow]Running {args.concurrency} virtual users for {args.duration}s "
+          f"(+{args.warmup}s warm-up)...[/yellow]")
+    virtual_users = [
+        asyncio.create_task(run_virtual_user(
+            base_url, stats, emails[i % len(emails)], mix, deadline, args.seed + i))
+        for i in range(args.concurrency)
+    ]
+    await asyncio.sleep(args.warmup)
+    stats.recording = True
+    measure_start = time.perf_counter()
+    await asyncio.gather(*virtual_users)
+    duration = time.perf_counter() - measure_start
+
+    if server_process is not None:
+        server_process.terminate()
+        server_process.wait()
+    else:
+        app_server.should_exit = True
+        await app_task
+    stub.should_exit = True
+    await stub_task
+
+    all_samples = [s for samples in stats.samples.values() for s in samples]
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {
+                "mongo": "memory" if args.mongo == "memory" else "mongod",
+                "spawn": args.spawn,
+                "workers": args.workers if args.spawn else 1,
+                "users": args.users,
+                "todos": args.todos,
+                "concurrency": args.concurrency,
+                "duration": args.duration,
+                "seed": args.seed,
+                "rate_limits": args.rate_limits,
+                "mix": mix,
+            },
+        },
+        "duration_s": round(duration, 3),
+        "endpoints": {
+            name: summarize(samples, stats.errors.get(name, 0), duration)
+            for name, samples in sorted(stats.samples.items())
+        },
+        "total": summarize(all_samples, sum(stats.errors.values()), duration),
+    }
+
+
+def print_report(results: dict) -> None:
+    from rich import print
+
+    print(f"{'endpoint':>16} {'count':>8} {'err':>5} {'rps':>9} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = list(results["endpoints"].items()) + [("TOTAL", results["total"])]
+    for name, s in rows:
+        print(f"{name:>16} {s['count']:>8} {s['errors']:>5} {s['rps']:>9.1f} "
+              f"{s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f}")
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown scenario: {name}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mongo", default="memory",
+                        help='"memory" (mongomock-motor) or a mongodb:// URI')
+    parser.add_argument("--spawn", action="store_true",
+                        help="run the app as a separate uvicorn process (needs a real mongod)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--todos", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="e.g. profile=20,list_todos=30,login=1")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--port", type=int, default=9494)
+    parser.add_argument("--stub-port", type=int, default=9797)
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limits", action="store_true",
+                        help="keep the login/register rate limits on")
+    parser.add_argument("--out", default="bench_results.json")
+    args = parser.parse_args()
+    if args.spawn and args.mongo == "memory":
+        parser.error("--spawn needs a real mongod (--mongo mongodb://...)")
+
+    results = asyncio.run(run(args, args.mix))
+    print_report(results)
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
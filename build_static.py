@@ -0,0 +1,83 @@
+"""
+Build the fingerprinted, precompressed static assets.
+
+For every file under `frontend/static`, writes a content-hashed copy
+(`css/styles.css` -> `css/styles.<hash>.css`) to `frontend/static_build`, plus `.gz` and
+(if the `brotli` package is installed) `.br` siblings for compressible types, and a
+`manifest.json` the server uses to rewrite asset URLs and pick precompressed variants.
+"""
+import os
+import gzip
+import json
+import shutil
+import hashlib
+
+from rich import print
+
+from backend.config.constants import FRONTEND_STATIC, FRONTEND_STATIC_BUILD, STATIC_MANIFEST
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HASH_LENGTH = 12
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".mjs", ".json",
+                           ".svg", ".html", ".txt", ".xml", ".map", ".ico"}
+# Don't bother keeping a compressed copy that saves less than this fraction
+MIN_SAVINGS = 0.05
+
+
+def hashed_name(rel_path: str, content: bytes) -> str:
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest}{ext}"
+
+
+def write_compressed(path: str, content: bytes) -> list[str]:
+    encodings = []
+    variants = [("br", ".br", brotli.compress(content, quality=11) if brotli else None),
+                ("gzip", ".gz", gzip.compress(content, compresslevel=9, mtime=0))]
+    for encoding, suffix, compressed in variants:
+        if compressed is None or len(compressed) > len(content) * (1 - MIN_SAVINGS):
+            continue
+        with open(path + suffix, "wb") as f:
+            f.write(compressed)
+        encodings.append(encoding)
+    return encodings
+
+
+def build() -> dict:
+    shutil.rmtree(FRONTEND_STATIC_BUILD, ignore_errors=True)
+    manifest = {"assets": {}, "encodings": {}}
+    for dirpath, _, filenames in os.walk(FRONTEND_STATIC):
+        for filename in sorted(filenames):
+            source = os.path.join(dirpath, filename)
+            rel_path = os.path.relpath(source, FRONTEND_STATIC).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                content = f.read()
+
+            target_rel = hashed_name(rel_path, content)
+            target = os.path.join(FRONTEND_STATIC_BUILD, target_rel)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(content)
+            manifest["assets"][rel_path] = target_rel
+
+            if os.path.splitext(filename)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                encodings = write_compressed(target, content)
+                if encodings:
+                    manifest["encodings"][target_rel] = encodings
+            print(f"  {rel_path} -> {target_rel} {manifest['encodings'].get(target_rel, [])}")
+
+    with open(os.path.join(FRONTEND_STATIC_BUILD, STATIC_MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+if __name__ == "__main__":
+    print("[yellow]Building static assets...[/yellow]")
+    if brotli is None:
+        print("[yellow]`brotli` not installed: skipping .br variants.[/yellow]")
+    manifest = build()
+    print(f"[green]Built {len(manifest['assets'])} assets into {FRONTEND_STATIC_BUILD}.[/green]")
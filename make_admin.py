@@ -0,0 +1,34 @@
+import sys
+import asyncio
+
+from rich import print
+from backend.config.db import get_email_collation, users_collection
+from backend.user_cache import invalidate_user, invalidation_channel
+
+
+async def set_admin(email: str, admin: bool) -> bool:
+    user = await users_collection.find_one_and_update(
+        {"email": email},
+        {"$set": {"admin": admin}},
+        projection={"_id": 1},
+        collation=get_email_collation(),
+    )
+    if user is None:
+        return False
+    # Admin routes check the db directly; this keeps every worker's cached copy consistent too
+    if invalidation_channel is not None:
+        await invalidation_channel.ensure_collection()
+    await invalidate_user(str(user["_id"]))
+    return True
+
+
+if len(sys.argv) < 2:
+    print("[red]Usage: python make_admin.py <email> [--revoke][/red]")
+    sys.exit(1)
+
+email = sys.argv[1]
+admin = "--revoke" not in sys.argv[2:]
+if not asyncio.run(set_admin(email, admin)):
+    print(f"[red]No user with email {email}.[/red]")
+    sys.exit(1)
+print(f"[green]{email} is {'now' if admin else 'no longer'} an admin.[/green]")
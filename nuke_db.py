@@ -1,9 +1,19 @@
+
+import asyncio
+
 from rich import print
-from config.db import users_collection, content_collection
+from backend.config.db import users_collection, content_collection, sessions_collection
+from backend.todo_versions import versions_collection
+
+
+async def nuke():
+    await users_collection.drop()
+    await sessions_collection.drop()
+    await content_collection.drop()
+    await versions_collection.drop()
 
 print("[yellow]-------------------------------------------------------------[/yellow]")
 print("[red][b]WARNING: Collection Purge In Effect![/b][/red]")
-users_collection.drop()
-content_collection.drop()
+asyncio.run(nuke())
 print("[green]Nuke Complete.[/green]")
 print("[yellow]-------------------------------------------------------------[/yellow]")
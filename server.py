@@ -1,53 +1,132 @@
+from time import perf_counter
+time_import_start = perf_counter()
+
 import os
+import importlib.util
+from contextlib import asynccontextmanager, contextmanager
 
 from fastapi import FastAPI, Request, status
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import ORJSONResponse
 from starlette.responses import RedirectResponse
-from starlette.middleware.base import BaseHTTPMiddleware
 
 from backend.routes.user_routes import user_router
 from backend.routes.todo_routes import todo_router
+from backend.routes.admin_routes import admin_router
 from backend.routes.jinja_routes import jinja_router
-
-from backend.log import get_logger
-from backend.middleware.logger import log_route
-
-from backend.config.constants import (
-    FRONTEND_PAGE_TEMPLATES,
-    FRONTEND_APP_PAGES
-)
-
-from dotenv import load_dotenv
-load_dotenv()
+from backend.routes.metrics_routes import metrics_router
+
+from backend.log import get_logger, start_logging, stop_logging
+from backend.middleware.logger import RouteTimingMiddleware
+from backend.middleware.metrics import MetricsMiddleware
+from backend.config.db import close_client, ensure_indexes, ping_db
+from backend.config.settings import get_settings
+from backend.hashing import hash_executor
+from backend.user_cache import invalidation_channel
+from backend.http_client import http_client
+from backend.token_codec import get_token_codec
+from backend.templating import precompile_templates, templates
+from backend.static_files import PrecompressedStaticFiles, get_static_manifest, static_url
+from backend.rate_limit import rate_limit_backend
+from backend.sessions import session_revocations
+from backend.todo_events import start_todo_events, stop_todo_events
+from backend.metrics import STARTUP_PHASE_DURATION
+
+from backend.config.constants import FRONTEND_APP_PAGES, FRONTEND_STATIC, STATIC_URL_PREFIX
 
 
 # Get our initial logger
 logger = get_logger(__name__)
 
+# Importing never connects to anything; every connection, file and thread is opened by the lifespan
+time_import = perf_counter() - time_import_start
+
+
+@contextmanager
+def startup_phase(timings: dict, phase: str):
+    time_start = perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = perf_counter() - time_start
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    timings = {"import": time_import}
+    with startup_phase(timings, "config"):
+        settings = get_settings()
+        settings.check()
+        get_token_codec()
+        started_logging = start_logging()
+    with startup_phase(timings, "db_ping"):
+        await ping_db()
+    with startup_phase(timings, "db_indexes"):
+        # Make sure the indexes our lookups depend on exist before serving traffic
+        await ensure_indexes()
+    with startup_phase(timings, "services"):
+        if invalidation_channel is not None:
+            await invalidation_channel.start()
+        await http_client.start()
+        await rate_limit_backend.setup()
+        await session_revocations.start()
+        await start_todo_events()
+    with startup_phase(timings, "templates"):
+        get_static_manifest()
+        if settings.templates_precompile:
+            logger.info(f"Precompiled {precompile_templates()} templates.")
+
+    for phase, seconds in timings.items():
+        STARTUP_PHASE_DURATION.labels(phase).set(seconds)
+    report = {phase: round(seconds, 4) for phase, seconds in timings.items()}
+    report["total"] = round(sum(timings.values()), 4)
+    logger.info(f"Worker {os.getpid()} startup timings (seconds): {report}",
+                extra={"startup": report})
+
+    yield
+
+    await stop_todo_events()
+    await session_revocations.stop()
+    await http_client.stop()
+    if invalidation_channel is not None:
+        await invalidation_channel.stop()
+    hash_executor.shutdown()
+    close_client()
+    if started_logging:
+        stop_logging()
+
+
 # Define our app and add any relevant middleware
 app = FastAPI(
     title="My New App",
     description="My New App is a super badass app that does badass things with stuff.",
     summary="TODO: Summary of the App goes here.",
-    version="0.0.1"
+    version="0.0.1",
+    lifespan=lifespan,
+    # JSON bodies are encoded with orjson (several times faster than `json` on big lists)
+    default_response_class=ORJSONResponse,
 )
-app.add_middleware(BaseHTTPMiddleware, dispatch=log_route)
+app.add_middleware(RouteTimingMiddleware)
+if get_settings().metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
 
 # Set the StaticFiles location for our assets (like CSS and images, etc.)
+# Serves the fingerprinted/precompressed output of `build_static.py` when it exists
 app.mount(
-    "/static", StaticFiles(directory="frontend/static", html=True),
+    STATIC_URL_PREFIX, PrecompressedStaticFiles(
+        directory=FRONTEND_STATIC, html=True),
     name="static-assets"
 )
 
-templates = Jinja2Templates(directory=FRONTEND_PAGE_TEMPLATES)
 
 # Add our routes
 routers = [
     user_router,
     todo_router,
+    admin_router,
     jinja_router,
 ]
+if get_settings().metrics_enabled:
+    routers.append(metrics_router)
 for router in routers:
     app.include_router(router=router)
 
@@ -55,7 +134,7 @@ for router in routers:
 # Set the `favicon` for your App (if desired)
 @app.get("/favicon.ico")
 async def get_favicon():
-    return RedirectResponse("/static/favicon.ico", status_code=status.HTTP_302_FOUND)
+    return RedirectResponse(static_url("favicon.ico"), status_code=status.HTTP_302_FOUND)
 
 
 # Handle the root "homepage" for the App
@@ -64,19 +143,53 @@ async def root_index(request: Request):
     return templates.TemplateResponse(f"{FRONTEND_APP_PAGES}/home/index.html", {"request": request})
 
 
+def get_uvicorn_options(settings) -> dict:
+    """
+    `uvicorn.run()` options for the configured serve mode. With `SERVER_RELOAD` it's a single
+    auto-reloading process; otherwise `SERVER_WORKERS` processes (CPU count in production)
+    share the socket. Each worker imports the app and runs the lifespan itself, so the Mongo
+    client, caches and thread pools are built per worker, after the process starts.
+    """
+    options = {
+        "app": "server:app",
+        "host": settings.server_host,
+        "port": settings.server_port,
+        "loop": settings.server_loop,
+        "http": settings.server_http,
+        "backlog": settings.server_backlog,
+        "timeout_keep_alive": settings.server_keepalive_timeout,
+        "timeout_graceful_shutdown": settings.server_graceful_timeout,
+        "access_log": settings.server_access_log,
+    }
+    # uvloop / httptools are optional extras (`pip install uvicorn[standard]`)
+    for option, package, fallback in (("loop", "uvloop", "asyncio"), ("http", "httptools", "h11")):
+        if options[option] == package and importlib.util.find_spec(package) is None:
+            logger.warning(
+                f"SERVER_{option.upper()}={package} but `{package}` is not installed; using {fallback}.")
+            options[option] = fallback
+    if settings.server_reload:
+        options["reload"] = True
+        return options
+
+    workers = settings.server_workers
+    if workers <= 0:
+        workers = (os.cpu_count() or 1) if settings.is_production else 1
+    options["workers"] = workers
+    # A worker exits (gracefully) after this many requests and the supervisor starts a fresh one;
+    # `kill -HUP <pid>` restarts every worker the same way, one at a time
+    if settings.server_max_requests > 0:
+        options["limit_max_requests"] = settings.server_max_requests
+    return options
+
+
 # Start the server with uvicorn
 if __name__ == "__main__":
-    SERVER_HOST = str(os.getenv("SERVER_HOST", "0.0.0.0"))
-    SERVER_PORT = int(os.getenv("SERVER_PORT", 9393))
-    SERVER_RELOAD = bool(os.getenv("SERVER_RELOAD", 0))
+    settings = get_settings()
     import uvicorn
     import time
     time_start = time.time()
-    logger.info("Starting up!")
-    uvicorn.run(
-        app="server:app",
-        host=SERVER_HOST,
-        port=SERVER_PORT,
-        reload=SERVER_RELOAD
-    )
+    start_logging()
+    options = get_uvicorn_options(settings)
+    logger.info(f"Starting up! {options}")
+    uvicorn.run(**options)
     logger.info(f"SHUTTING DOWN; runtime: '{time.time() - time_start}s'")